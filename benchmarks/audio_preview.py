@@ -0,0 +1,48 @@
+import os
+import time
+import numpy as np
+from guitar_chords.collection.audio import get_frequency_matrix, synthesize_strums
+from guitar_chords.collection.collection import ChordCollection
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+def synthesize_one_by_one(chords, sample_rate=22050, duration=1.5, strum_delay=0.03, decay=3.0):
+    # Chord by chord from calculate_frequencies, as the preview job did
+    times = np.arange(int(sample_rate * duration)) / sample_rate
+    waveforms = []
+    for chord in chords:
+        frequencies = chord.calculate_frequencies()
+        waveform = np.zeros(len(times))
+        for string_number, frequency in frequencies.items():
+            string_time = times - (6 - string_number) * strum_delay
+            waveform += np.where(string_time >= 0, np.sin(2 * np.pi * frequency * np.maximum(string_time, 0)) * np.exp(-decay * np.maximum(string_time, 0)), 0)
+        waveforms.append((waveform / max(len(frequencies), 1)).astype(np.float32))
+    return waveforms
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main(size=1000):
+    collection = ChordCollection()
+    collection.load(db_path)
+    collection.extend_barre_chords()
+    chords = (collection.chords * (size // len(collection.chords) + 1))[:size]
+
+    loop_time, _ = timed(lambda: [chord.calculate_frequencies() for chord in chords])
+    matrix_time, frequencies = timed(get_frequency_matrix, chords)
+    print(f"{size} chords")
+    print(f"frequencies, chord by chord: {loop_time:.4f}s, matrix: {matrix_time:.4f}s")
+
+    one_by_one_time, waveforms = timed(synthesize_one_by_one, chords)
+    batch_time, batch_waveforms = timed(synthesize_strums, frequencies)
+    assert np.allclose(np.stack(waveforms), batch_waveforms, atol=1e-5)
+    print(f"strums, chord by chord: {one_by_one_time:.2f}s, vectorised: {batch_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+import tempfile
+import tracemalloc
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.compact import CompactChord
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+def make_rows(size):
+    # Rows as sqlite3 returns them, every string a fresh object
+    stored_rows = list(ChordCollection.iter_chords(db_path, as_rows=True))
+    rows = []
+    for i in range(size):
+        root, chord_type, starting_fret, *fingers = stored_rows[i % len(stored_rows)]
+        rows.append((str(root), f"{chord_type}_{i // len(stored_rows)}", starting_fret, *fingers))
+    return rows
+
+
+def bytes_per_chord(rows, make_chord, compute_features=False):
+    tracemalloc.start()
+    chords = [make_chord(row) for row in rows]
+    if compute_features:
+        for chord in chords:
+            chord.get_inversion()
+            chord.get_pitch_class_mask()
+            chord.get_string_mask()
+            chord.is_open()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(chords)
+
+
+def bytes_per_loaded_chord(rows, compact):
+    # Everything a ChordCollection keeps after load(), bookkeeping for incremental saves included
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "chords.db")
+        connection = sqlite3.connect(path)
+        with connection:
+            ChordCollection._create_schema(connection.cursor())
+            connection.executemany('''
+                INSERT INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        connection.close()
+
+        tracemalloc.start()
+        collection = ChordCollection()
+        collection.load(path, compact=compact)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return size / len(collection.chords)
+
+
+def main(size=100000):
+    rows = make_rows(size)
+    make_guitar_chord = lambda row: GuitarChord(row[0], row[1], transposable_figures, starting_fret=row[2], finger_ascending=list(row[3:]))
+    make_compact_chord = lambda row: CompactChord(row[0], row[1], starting_fret=row[2], finger_ascending=row[3:])
+
+    print(f"{size} chords, bytes per chord including the list holding them")
+    print(f"GuitarChord: {bytes_per_chord(rows, make_guitar_chord):.0f}")
+    print(f"GuitarChord, features computed: {bytes_per_chord(rows, make_guitar_chord, compute_features=True):.0f}")
+    CompactChord.shapes.clear()
+    print(f"CompactChord: {bytes_per_chord(rows, make_compact_chord):.0f}")
+    CompactChord.shapes.clear()
+    print(f"CompactChord, features computed: {bytes_per_chord(rows, make_compact_chord, compute_features=True):.0f}")
+    print(f"ChordCollection.load(): {bytes_per_loaded_chord(rows, compact=False):.0f}")
+    CompactChord.shapes.clear()
+    print(f"ChordCollection.load(compact=True): {bytes_per_loaded_chord(rows, compact=True):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import random
+import time
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+# The shifted figures let every synthetic barre chord slide up to the 9th fret
+benchmark_figures = transposable_figures + [[fret + 1 if fret is not None else None for fret in figure] for figure in transposable_figures]
+
+
+class LinearChordCollection(ChordCollection):
+    # Membership test as it was before the collection kept a key index
+    def chord_exists(self, new_chord):
+        for chord in self.chords:
+            if chord.root == new_chord.root and chord.chord_type == new_chord.chord_type and chord.starting_fret == new_chord.starting_fret and chord.finger_ascending == new_chord.finger_ascending:
+                return True
+        return False
+
+    def add_chord(self, chord):
+        if self.chord_exists(chord):
+            return False
+        self.chords.append(chord)
+        return True
+
+
+class StepwiseChordCollection(ChordCollection):
+    # One transpose() per distance until it raises, as it was before get_transpositions
+    def extend_barre_chords(self):
+        self._index_chords()
+        for chord in self.chords.copy():
+            counter = 1
+            while True:
+                try:
+                    new_chord = GuitarChord(chord.root, chord.chord_type, chord.transposable_figures, finger_ascending=chord.finger_ascending, starting_fret=chord.starting_fret)
+                    new_chord.transpose(counter)
+                    self.add_chord(new_chord)
+                    counter += 1
+                except ValueError:
+                    break
+
+
+def make_chords(size, seed=0):
+    rng = random.Random(seed)
+    chords = []
+    for i in range(size):
+        root = rng.choice(GuitarChord.all_notes)
+        figure = rng.choice(transposable_figures)
+        chords.append(GuitarChord(root, f"type_{i % 50}", benchmark_figures, finger_ascending=list(figure), starting_fret=rng.randint(1, 9)))
+    return chords
+
+
+def time_extend(collection_class, chords):
+    collection = collection_class()
+    collection.chords = [GuitarChord(c.root, c.chord_type, c.transposable_figures, finger_ascending=c.finger_ascending, starting_fret=c.starting_fret) for c in chords]
+    start = time.perf_counter()
+    collection.extend_barre_chords()
+    return time.perf_counter() - start, len(collection.chords)
+
+
+def main(sizes=(100, 250, 500, 1000, 2000)):
+    print(f"{'size':>6} {'extended':>9} {'linear (s)':>11} {'stepwise (s)':>13} {'batch (s)':>10}")
+    for size in sizes:
+        chords = make_chords(size)
+        linear_time, linear_size = time_extend(LinearChordCollection, chords)
+        stepwise_time, stepwise_size = time_extend(StepwiseChordCollection, chords)
+        batch_time, batch_size = time_extend(ChordCollection, chords)
+        assert linear_size == stepwise_size == batch_size
+        print(f"{size:>6} {batch_size:>9} {linear_time:>11.4f} {stepwise_time:>13.4f} {batch_time:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import random
+import time
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.identification import ChordIdentifier
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+def make_tabs(size, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice("x0123456789") for _ in range(6)) for _ in range(size)]
+
+
+def main(sizes=(1000, 10000, 100000)):
+    collection = ChordCollection()
+    collection.load(db_path)
+    start = time.perf_counter()
+    identifier = ChordIdentifier.from_collection(collection)
+    print(f"index of {len(identifier.chord_type_intervals)} chord types built in {time.perf_counter() - start:.4f}s")
+
+    print(f"{'tabs':>7} {'named':>6} {'identify_many (s)':>18}")
+    for size in sizes:
+        tabs = make_tabs(size)
+        start = time.perf_counter()
+        names = identifier.identify_many(tabs)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>7} {sum(1 for name in names if name):>6} {elapsed:>18.3f}")
+
+
+if __name__ == "__main__":
+    main()
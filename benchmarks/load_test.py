@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# Requests sent round-robin, so concurrent clients often ask the same thing
+default_paths = [
+    "/chords?root=C",
+    "/chords?root=A&chord_type=m&open=false",
+    "/chords?scale=G:ionian&include_string=1,2",
+    "/tonality?root=G&scale=ionian&amplitude=4",
+    "/tonality?root=D&scale=dorian&amplitude=3&rank=2",
+    "/positions?amplitude=3,4",
+    "/identify?tab=x32010&tab=022100&tab=133211",
+    "/render?root=C&limit=8",
+]
+
+
+async def request(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, body
+
+
+async def run_client(host, port, paths, request_count, offset, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for request_id in range(request_count):
+            path = paths[(offset + request_id) % len(paths)]
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                failures.append((path, status))
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, clients, requests_per_client, paths):
+    latencies = []
+    failures = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, paths, requests_per_client, client_id, latencies, failures) for client_id in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, body = await request(reader, writer, host, "/metrics")
+    writer.close()
+    return sorted(latencies), failures, elapsed, json.loads(body)
+
+
+def start_server():
+    # The service in its own process group with its render workers, on a free port
+    server = subprocess.Popen([sys.executable, "-m", "guitar_chords.service.server", "--port", "0"], stdout=subprocess.PIPE, text=True, start_new_session=True)
+    address = server.stdout.readline().strip().rsplit("//", 1)[1]
+    host, port = address.rsplit(":", 1)
+    return server, host, int(port)
+
+
+def stop_server(server, timeout=10):
+    # Render workers share the server's stdout, so the whole group has to go for the pipe to close
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+    try:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    server.stdout.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent clients against the chord service")
+    parser.add_argument("--address", help="host:port of a running service, one is started when omitted")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.address:
+        host, port = args.address.rsplit(":", 1)
+        port = int(port)
+    else:
+        server, host, port = start_server()
+    try:
+        latencies, failures, elapsed, metrics = asyncio.run(run_load(host, port, args.clients, args.requests, default_paths))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    percentile = lambda fraction: 1000 * latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+    print(f"{len(latencies)} requests from {args.clients} clients in {elapsed:.2f}s, {len(latencies) / elapsed:.0f} requests/s, {len(failures)} failed")
+    print(f"client latency p50 {percentile(0.5):.1f}ms, p90 {percentile(0.9):.1f}ms, p99 {percentile(0.99):.1f}ms, max {1000 * latencies[-1]:.1f}ms")
+    print(f"coalesced on the server: {metrics['coalesced']}")
+    for endpoint, stats in sorted(metrics["endpoints"].items()):
+        print(f"  {endpoint:<11} {stats['requests']:>6} requests, p50 {stats['p50_ms']:.1f}ms, p99 {stats['p99_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import itertools
+import os
+import time
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.progression import ProgressionOptimizer, VoiceLeadingCost
+from guitar_chords.collection.resources.scales import scales
+from guitar_chords.collection.voicings import VoicingGenerator
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+def brute_force(candidate_lists, cost):
+    # Every combination of voicings, as the notebook did
+    return min(itertools.product(*candidate_lists), key=lambda voicings: sum(cost(a, b) for a, b in zip(voicings, voicings[1:])))
+
+
+def main(brute_force_candidates=8):
+    collection = ChordCollection()
+    collection.load(db_path)
+    VoicingGenerator().extend_collection(collection)
+    optimizer = ProgressionOptimizer(collection)
+
+    steps = optimizer.get_diatonic_steps("C", scales["ionian"], "I-vi-IV-V")
+    candidate_lists = [optimizer.get_candidates(step)[:brute_force_candidates] for step in steps]
+    start = time.perf_counter()
+    brute_force(candidate_lists, VoiceLeadingCost())
+    brute_force_time = time.perf_counter() - start
+    start = time.perf_counter()
+    optimizer.optimize(candidate_lists)
+    optimize_time = time.perf_counter() - start
+    print(f"I-vi-IV-V with {brute_force_candidates} voicings per chord: brute force {brute_force_time:.3f}s, optimize {optimize_time:.4f}s")
+
+    progressions = [
+        optimizer.get_diatonic_steps(tonic, scales[mode], degrees)
+        for tonic in ["C", "G", "D", "A", "E", "F"]
+        for mode in ["ionian", "dorian", "aeolian"]
+        for degrees in ["I-vi-IV-V", "ii-V-I", "I-IV-V-I", "vi-IV-I-V"]
+    ]
+    candidate_counts = [len(optimizer.get_candidates(step)) for steps in progressions for step in steps]
+    print(f"{len(progressions)} progressions over {len(collection.chords)} chords, {sum(candidate_counts) / len(candidate_counts):.0f} voicings per chord on average")
+    for run in ("cold", "warm"):
+        start = time.perf_counter()
+        optimizer.optimize_many(progressions)
+        elapsed = time.perf_counter() - start
+        print(f"{run} cost matrices: {elapsed:.3f}s, {len(progressions) / elapsed:.0f} progressions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+import time
+from guitar_chords.builder.builders import ShortBuilder
+from guitar_chords.builder.director import Director
+from guitar_chords.collection.collection import ChordCollection
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+def main(size=1000, worker_counts=(1, 2, 4, 8)):
+    collection = ChordCollection()
+    collection.load(db_path)
+    chords = (collection.chords * (size // len(collection.chords) + 1))[:size]
+
+    print(f"{size} diagrams, {os.cpu_count()} CPUs")
+    for workers in worker_counts:
+        director = Director(ShortBuilder())
+        start = time.perf_counter()
+        director.build_multiple_chords(chords, columns=4, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers} workers: {elapsed:.2f}s, {size / elapsed:.0f} diagrams/s")
+
+
+if __name__ == "__main__":
+    main()
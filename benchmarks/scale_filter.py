@@ -0,0 +1,39 @@
+import os
+import time
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.scales import scales
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+def validate_against_scale_by_list(chord, tonic, scale):
+    # Scale check as it was before chords and scales were compared as pitch-class masks
+    tonic_index = GuitarChord.all_notes.index(tonic)
+    reordered_notes = GuitarChord.all_notes[tonic_index:] + GuitarChord.all_notes[:tonic_index]
+    scale_notes = [reordered_notes[i] for i in scale]
+    return all(note in scale_notes for note in chord.get_notes())
+
+
+def main():
+    collection = ChordCollection()
+    collection.load(db_path)
+    collection.extend_barre_chords()
+    tonalities = [(tonic, scale) for tonic in GuitarChord.all_notes for scale in scales.values()]
+
+    start = time.perf_counter()
+    list_counts = [sum(validate_against_scale_by_list(chord, tonic, scale) for chord in collection.chords) for tonic, scale in tonalities]
+    list_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask_counts = [len(collection.only({"scale": [(tonic, scale)]})) for tonic, scale in tonalities]
+    mask_time = time.perf_counter() - start
+
+    assert list_counts == mask_counts
+    print(f"{len(collection.chords)} chords x {len(tonalities)} tonic/mode combinations")
+    print(f"list membership: {list_time:.4f}s")
+    print(f"pitch-class masks: {mask_time:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
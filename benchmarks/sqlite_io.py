@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import tempfile
+import time
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+
+def make_chords(size):
+    # Distinct chords: every (root, figure, fret) combination under as many chord types as needed
+    chords = []
+    combinations = [(root, figure, fret) for root in GuitarChord.all_notes for figure in transposable_figures for fret in range(1, 10)]
+    for i in range(size):
+        root, figure, fret = combinations[i % len(combinations)]
+        chords.append(GuitarChord(root, f"type_{i // len(combinations)}", transposable_figures, finger_ascending=list(figure), starting_fret=fret))
+    return chords
+
+
+def save_row_by_row(chords, db_name):
+    # Save as it was before executemany, one INSERT per chord
+    connection = sqlite3.connect(db_name)
+    cursor = connection.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS TABLE_CHORDS (
+            ID INTEGER PRIMARY KEY, ROOT TEXT, TYPE TEXT, STARTING_FRET INTEGER,
+            STRING_1 INTEGER, STRING_2 INTEGER, STRING_3 INTEGER, STRING_4 INTEGER, STRING_5 INTEGER, STRING_6 INTEGER
+        )
+    ''')
+    for chord in chords:
+        cursor.execute('''
+            INSERT INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending))
+    connection.commit()
+    connection.close()
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main(size=100000):
+    collection = ChordCollection()
+    collection.chords = make_chords(size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        row_by_row_path = os.path.join(directory, "row_by_row.db")
+        bulk_path = os.path.join(directory, "bulk.db")
+
+        print(f"{size} chords")
+        print(f"save, one INSERT per chord: {timed(save_row_by_row, collection.chords, row_by_row_path):.3f}s")
+        print(f"save, executemany: {timed(collection.save, bulk_path):.3f}s")
+        print(f"save again, nothing new: {timed(collection.save, bulk_path):.3f}s")
+
+        loaded = ChordCollection()
+        print(f"load: {timed(loaded.load, bulk_path):.3f}s")
+        loaded.add_chord(GuitarChord("C", "new", transposable_figures, finger_ascending=[1, 1, 2, 3, 3, 1], starting_fret=1))
+        print(f"incremental save, one new chord: {timed(loaded.save, bulk_path, incremental=True):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
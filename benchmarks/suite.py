@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from guitar_chords.benchmarks.extend_barre_chords import make_chords
+from guitar_chords.builder.builders import ShortBuilder, LongBuilder
+from guitar_chords.builder.director import Director
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.scales import scales
+
+# Whitelists timed with only(), one per criterion it accepts
+only_whitelists = {
+    "root": {"root": ["C", "G"]},
+    "chord_type": {"chord_type": ["type_0", "type_1"]},
+    "open": {"open": [False]},
+    "starting_fret": {"starting_fret": [3, 5]},
+    "include_string": {"include_string": [1, 6]},
+    "inversion": {"inversion": [1]},
+    "scale": {"scale": [("C", scales["ionian"])]},
+}
+# Diagrams drawn by the rendering benchmarks, whatever the collection size
+render_count = 64
+
+
+def measure(function, setup=None, repeat=3, min_time=0.02):
+    # Runs setup untimed before each call; the first call is kept apart as it fills lazy caches.
+    # Calls without setup are repeated until they last min_time, timeit style, and timed per call
+    start = time.perf_counter()
+    function(setup() if setup is not None else None)
+    first = time.perf_counter() - start
+
+    number = 1
+    if setup is None and first < min_time:
+        number = max(1, int(min_time / max(first, 1e-7)))
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        for _ in range(number):
+            function(state)
+        times.append((time.perf_counter() - start) / number)
+    return {"first": first, "min": min(times), "mean": sum(times) / len(times), "repeat": repeat, "number": number}
+
+
+def copy_chords(chords):
+    return [GuitarChord(chord.root, chord.chord_type, chord.transposable_figures, finger_ascending=chord.finger_ascending, starting_fret=chord.starting_fret) for chord in chords]
+
+
+def new_collection(chords):
+    collection = ChordCollection()
+    collection.chords = copy_chords(chords)
+    return collection
+
+
+def run_collection_benchmarks(size, repeat, directory):
+    chords = make_chords(size)
+    db_path = os.path.join(directory, f"chords_{size}.db")
+    results = {}
+
+    def new_database():
+        # Every save writes a new file, removing the old one is not timed
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        return new_collection(chords)
+
+    results["save"] = measure(lambda collection: collection.save(db_path), new_database, repeat)
+    results["load"] = measure(lambda collection: collection.load(db_path), ChordCollection, repeat)
+    results["extend_barre_chords"] = measure(lambda collection: collection.extend_barre_chords(), lambda: new_collection(chords), repeat)
+
+    # Queries share one collection, so "first" includes building the index each criterion uses
+    collection = new_collection(chords)
+    for key, whitelist in only_whitelists.items():
+        results[f"only[{key}]"] = measure(lambda _: collection.only(whitelist), repeat=repeat)
+    results["filter_out"] = measure(lambda _: collection.filter_out({"root": ["C"], "open": [False]}), repeat=repeat)
+    results["get_tonality"] = measure(lambda _: collection.get_tonality("C", scales["ionian"]), repeat=repeat)
+
+    # Fresh copies every run, so no derived feature is cached yet
+    results["get_notes"] = measure(lambda chord_list: [chord.get_notes() for chord in chord_list], lambda: copy_chords(chords), repeat)
+
+    def transpose_all(chord_list):
+        for chord in chord_list:
+            try:
+                chord.transpose(1)
+            except ValueError:
+                pass
+
+    results["transpose"] = measure(transpose_all, lambda: copy_chords(chords), repeat)
+    return results
+
+
+def run_render_benchmarks(repeat):
+    chords = make_chords(render_count)
+    results = {}
+    results[f"build_multiple_chords[ShortBuilder][{render_count}]"] = measure(lambda director: director.build_multiple_chords(chords, columns=4), lambda: Director(ShortBuilder()), repeat)
+
+    def build_scales(_):
+        # build_scale shifts the name of the builder it uses, so each scale gets a fresh one
+        for scale in scales.values():
+            Director(LongBuilder()).build_scale("C", scale)
+
+    results[f"build_scale[LongBuilder][{len(scales)}]"] = measure(build_scales, repeat=repeat)
+    return results
+
+
+def get_environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(results, baseline, threshold):
+    # Ratios of the best times against a previous run; returns the benchmarks slower than threshold
+    regressions = []
+    print(f"{'benchmark':<48} {'baseline (ms)':>14} {'current (ms)':>13} {'ratio':>7}")
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        baseline_time = baseline["benchmarks"][name]["min"]
+        ratio = result["min"] / baseline_time if baseline_time else float("inf")
+        flag = " slower" if ratio > threshold else ""
+        print(f"{name:<48} {1000 * baseline_time:>14.3f} {1000 * result['min']:>13.3f} {ratio:>7.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times the collection, query and rendering hot paths on synthetic collections")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="comma separated collection sizes; 1000000 takes about 2 GB of memory")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-render", action="store_true")
+    parser.add_argument("--output", help="JSON file for the results")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="ratio above which a benchmark counts as slower")
+    args = parser.parse_args(argv)
+
+    results = {"environment": get_environment(), "sizes": [int(size) for size in args.sizes.split(",")], "benchmarks": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in results["sizes"]:
+            for name, result in run_collection_benchmarks(size, args.repeat, directory).items():
+                results["benchmarks"][f"{name}[{size}]"] = result
+                print(f"{name}[{size}]: {1000 * result['min']:.3f}ms (first {1000 * result['first']:.3f}ms)", flush=True)
+    if not args.skip_render:
+        for name, result in run_render_benchmarks(args.repeat).items():
+            results["benchmarks"][name] = result
+            print(f"{name}: {1000 * result['min']:.3f}ms (first {1000 * result['first']:.3f}ms)", flush=True)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmarks slower than {args.threshold}x the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
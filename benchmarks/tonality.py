@@ -0,0 +1,76 @@
+import os
+import time
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.scales import scales
+
+db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+
+class RescanningChordCollection(ChordCollection):
+    # Window search as it was before the tonality histogram: two only() calls and a full sort per query
+    def get_tonality(self, root, scale, amplitude=4, rank=1):
+        def harmonic_sum(n):
+            return sum(1 / i for i in range(1, n + 1))
+
+        guitar = [{} for _ in range(12)]
+        for chord in self.only({"root": [root], "scale": [(root, scale)]}):
+            if not chord.is_open() and 0 < chord.starting_fret <= 12:
+                guitar[chord.starting_fret - 1][chord.root] = guitar[chord.starting_fret - 1].get(chord.root, 0) + 1
+
+        density_list = []
+        for start_fret in range(len(guitar) - amplitude + 1):
+            note_counts = {}
+            for fret in guitar[start_fret:start_fret + amplitude]:
+                for note, count in fret.items():
+                    note_counts[note] = note_counts.get(note, 0) + count
+            density = 1
+            for count in note_counts.values():
+                density *= harmonic_sum(count)
+            density_list.append((density, start_fret))
+        density_list.sort(key=lambda x: x[0], reverse=True)
+        optimal_start_fret = density_list[rank - 1][1] if rank <= len(density_list) else -1
+
+        selected_frets = list(range(optimal_start_fret + 1, optimal_start_fret + amplitude + 1))
+        return self.only({"scale": [(root, scale)], "starting_fret": selected_frets, "open": [False]})
+
+
+def load(collection_class, copies):
+    collection = collection_class()
+    collection.load(db_path)
+    collection.extend_barre_chords()
+    # Repeat the chords under new types to get a bigger collection with the same shape
+    original_chords = collection.chords.copy()
+    for copy in range(1, copies):
+        for chord in original_chords:
+            collection.chords.append(GuitarChord(chord.root, f"{chord.chord_type}_{copy}", chord.transposable_figures, finger_ascending=chord.finger_ascending, starting_fret=chord.starting_fret))
+    return collection
+
+
+def time_all_positions(collection, amplitudes):
+    # Every tonic x mode x amplitude, as the position suggestions need
+    start = time.perf_counter()
+    for root in GuitarChord.all_notes:
+        for scale in scales.values():
+            for amplitude in amplitudes:
+                collection.get_tonality(root, scale, amplitude)
+    return time.perf_counter() - start
+
+
+def main(copies_list=(1, 4, 16), amplitudes=(3, 4, 5)):
+    print(f"{'chords':>7} {'rescan (s)':>11} {'histogram (s)':>14} {'frets only (s)':>15}")
+    for copies in copies_list:
+        rescanning = load(RescanningChordCollection, copies)
+        indexed = load(ChordCollection, copies)
+        rescan_time = time_all_positions(rescanning, amplitudes)
+        histogram_time = time_all_positions(indexed, amplitudes)
+
+        indexed._index_chords()
+        start = time.perf_counter()
+        indexed.get_all_tonality_frets(amplitudes=amplitudes)
+        frets_time = time.perf_counter() - start
+        print(f"{len(indexed.chords):>7} {rescan_time:>11.3f} {histogram_time:>14.3f} {frets_time:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
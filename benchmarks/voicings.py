@@ -0,0 +1,26 @@
+import time
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.chord_types import chord_types
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+from guitar_chords.collection.voicings import VoicingGenerator
+
+
+def main(spans=(2, 3, 4)):
+    print(f"{len(chord_types)} chord types x 12 roots")
+    print(f"{'span':>4} {'voicings':>9} {'search (s)':>11} {'into collection (s)':>20}")
+    for span in spans:
+        generator = VoicingGenerator(max_span=span, transposable_figures=[figure.copy() for figure in transposable_figures])
+        start = time.perf_counter()
+        voicing_count = sum(1 for _ in generator.generate_all())
+        search_time = time.perf_counter() - start
+
+        # Shapes are cached by now, this times building and indexing the chords
+        collection = ChordCollection()
+        start = time.perf_counter()
+        generator.extend_collection(collection, register_figures=True)
+        collection_time = time.perf_counter() - start
+        print(f"{span:>4} {voicing_count:>9} {search_time:>11.3f} {collection_time:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
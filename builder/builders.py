@@ -3,6 +3,24 @@ from PIL import Image, ImageDraw, ImageFont
 class AbstractBuilder:
     all_notes = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
     open_string_notes = ["E", "B", "G", "D", "A", "E"]
+    # Loaded fonts keyed by (path, size), shared by every builder in the process
+    font_cache = {}
+    # Width and height of note labels keyed by (path, size, label)
+    label_size_cache = {}
+    # Pre-rendered empty fretboards keyed by geometry and muted strings
+    fretboard_templates = {}
+    # Pre-rendered RGBA note dots keyed by font, orientation, colours and label
+    note_stamps = {}
+    # Pre-rendered RGBA text keyed by font, size and text
+    text_stamps = {}
+    # Note lookup tables keyed by orientation, coordenates, starting fret and colours
+    note_tables = {}
+    # Scale degree labels of every note keyed by root
+    note_degrees = {}
+    # Margin around a note dot or text in its stamp, wide enough for overhanging glyphs
+    stamp_margin = 20
+    # Format of the images get_result returns
+    image_format = 'png'
 
     def __init__(self):
         self.image_size = None
@@ -23,24 +41,105 @@ class AbstractBuilder:
         self.scale_name = None
         self.scale = None
         self.note_colors = {'C': (13, 116, 255), 'D': (255, 0, 6), 'E': (255, 242, 0), 'F': (152, 39, 201), 'G': (253, 148, 4), 'A': (32, 255, 49), 'B': (255, 77, 215)}
-
+        # Composite diagrams from cached fretboards and note stamps instead of drawing them
+        self.use_sprites = True
 
     def draw_boundaries(self):
         self.image = Image.new('RGB', self.image_size, 'white')
         self.draw = ImageDraw.Draw(self.image)
 
+    def new_sheet(self, size):
+        # Blank image that Director pastes several diagrams into
+        return Image.new('RGB', size, 'white')
+
+    def _get_fretboard_key(self):
+        muted_strings = tuple(fret is None for fret in self.finger_ascending) if self.finger_ascending else ()
+        return (
+            type(self), self.image_size, self.line_thickness,
+            tuple(self.fret_edges), tuple(self.frets_starting_points),
+            tuple(self.string_edges), tuple(self.strings_starting_points),
+            tuple(self.notes_coordenates["frets"]), muted_strings,
+        )
+
+    def get_cache_key(self):
+        # Everything besides the diagram content that changes the rendered pixels
+        return (
+            type(self).__name__, self.image_size, self.line_thickness, self.is_horizontal,
+            tuple(self.fret_edges), tuple(self.frets_starting_points),
+            tuple(self.string_edges), tuple(self.strings_starting_points),
+            tuple(self.notes_coordenates["strings"]), tuple(self.notes_coordenates["frets"]),
+            self.name_coordenate, self.font, self.font_size, tuple(sorted(self.note_colors.items())),
+        )
+
+    def draw_fretboard(self):
+        if not self.use_sprites:
+            self.draw_boundaries()
+            self.draw_frets()
+            self.draw_strings()
+            return
+
+        key = self._get_fretboard_key()
+        if key not in AbstractBuilder.fretboard_templates:
+            self.draw_boundaries()
+            self.draw_frets()
+            self.draw_strings()
+            AbstractBuilder.fretboard_templates[key] = self.image
+        self.image = AbstractBuilder.fretboard_templates[key].copy()
+        self.draw = ImageDraw.Draw(self.image)
+
     def draw_frets(self):
         for fret_start in self.frets_starting_points:
             start_point = (fret_start, self.fret_edges[0]) if self.is_horizontal else (self.fret_edges[0], fret_start)
             end_point = (fret_start, self.fret_edges[1]) if self.is_horizontal else (self.fret_edges[1], fret_start)
             self.draw.line(start_point + end_point, fill='black', width=self.line_thickness)
 
+    def get_font(self, size):
+        key = (self.font, size)
+        if key not in AbstractBuilder.font_cache:
+            try:
+                font = ImageFont.truetype(self.font, size)
+            except IOError:
+                font = ImageFont.load_default()
+            AbstractBuilder.font_cache[key] = font
+        return AbstractBuilder.font_cache[key]
+
+    def get_label_size(self, draw, label, font_size):
+        key = (self.font, font_size, label)
+        if key not in AbstractBuilder.label_size_cache:
+            text_bbox = draw.textbbox((0, 0), label, font=self.get_font(font_size))
+            AbstractBuilder.label_size_cache[key] = (text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1])
+        return AbstractBuilder.label_size_cache[key]
+
+    def write_text(self, coordenate, text, font_size):
+        if not self.use_sprites or not all(isinstance(value, int) for value in coordenate):
+            self.draw.text(coordenate, text, fill='black', font=self.get_font(font_size))
+            return
+
+        key = (self.font, font_size, text)
+        if key not in AbstractBuilder.text_stamps:
+            font = self.get_font(font_size)
+            margin = AbstractBuilder.stamp_margin
+            text_bbox = ImageDraw.Draw(Image.new('RGBA', (1, 1))).textbbox((margin, margin), text, font=font)
+            stamp = Image.new('RGBA', (max(text_bbox[2], 0) + margin, max(text_bbox[3], 0) + margin), (0, 0, 0, 0))
+            ImageDraw.Draw(stamp).text((margin, margin), text, fill='black', font=font)
+            AbstractBuilder.text_stamps[key] = self._crop_stamp(stamp, (margin, margin))
+        self._paste_stamp(AbstractBuilder.text_stamps[key], coordenate)
+
+    def _crop_stamp(self, stamp, anchor):
+        # Trim transparent borders, keeping where the anchor point falls in the stamp
+        bbox = stamp.getchannel('A').getbbox()
+        if bbox is None:
+            return None
+        return stamp.crop(bbox), (anchor[0] - bbox[0], anchor[1] - bbox[1])
+
+    def _paste_stamp(self, cropped_stamp, coordenate):
+        if cropped_stamp is None:
+            return
+        stamp, anchor = cropped_stamp
+        self.image.paste(stamp, (coordenate[0] - anchor[0], coordenate[1] - anchor[1]), stamp)
+
     def write_name(self, name):
-        try:
-            font = ImageFont.truetype(self.font, self.font_size)
-        except IOError:
-            font = ImageFont.load_default()
-        self.draw.text(self.name_coordenate, name, fill='black', font=font)
+        self.write_text(self.name_coordenate, name, self.font_size)
 
     def draw_notes(self, notes_style):
         raise NotImplementedError
@@ -64,12 +163,25 @@ class AbstractBuilder:
 
 
     def draw_note_at_coordenate(self, coordenate, color_a, color_b, label=''):
+        if not self.use_sprites:
+            self._draw_note_shape(self.image, coordenate, color_a, color_b, label)
+            return
+
+        key = (self.font, self.is_horizontal, color_a, color_b, label)
+        if key not in AbstractBuilder.note_stamps:
+            center = 15 + AbstractBuilder.stamp_margin
+            stamp = Image.new('RGBA', (2 * center + 1, 2 * center + 1), (0, 0, 0, 0))
+            self._draw_note_shape(stamp, (center, center), color_a, color_b, label)
+            AbstractBuilder.note_stamps[key] = self._crop_stamp(stamp, (center, center))
+        self._paste_stamp(AbstractBuilder.note_stamps[key], coordenate)
+
+    def _draw_note_shape(self, image, coordenate, color_a, color_b, label):
         if self.is_horizontal:
             rotation_angle = 45
         else:
             rotation_angle = 135
         
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(image)
         radius = 15
         upper_left = (coordenate[0] - radius, coordenate[1] - radius)
         lower_right = (coordenate[0] + radius, coordenate[1] + radius)
@@ -85,14 +197,9 @@ class AbstractBuilder:
 
         # Draw the label
         if label:
-            try:
-                font = ImageFont.truetype(self.font, int(radius * 1.2))
-            except IOError:
-                font = ImageFont.load_default()
-
-            text_bbox = draw.textbbox((0, 0), label, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
+            font_size = int(radius * 1.2)
+            font = self.get_font(font_size)
+            text_width, text_height = self.get_label_size(draw, label, font_size)
             text_coordenate = (coordenate[0] - text_width / 2, coordenate[1] - text_height / 2 - 3)  # Shift 7 pixels up
             draw.text(text_coordenate, label, fill='black', font=font)
 
@@ -191,34 +298,51 @@ class AbstractBuilder:
         if self.finger_ascending is not None and self.is_horizontal:
             raise ValueError("Chords cannot be built by LongBuilder")
 
-        scale_degrees = ['I', '', 'II', '', 'III', 'IV', '', 'V', '', 'VI', '', 'VII']
-        
-        # Calculate the chromatic scale starting from the root
-        root_index = self.all_notes.index(self.root)
-        chromatic_scale = [self.all_notes[(root_index + i) % len(self.all_notes)] for i in range(len(self.all_notes))]
-    
-        # Map notes to their scale degrees
-        note_to_degree = {note: degree for note, degree in zip(chromatic_scale, scale_degrees)}
-    
+        note_to_degree = self.get_note_degrees()
+        note_table = self.get_note_table()
+
         # Draw notes for the chord
         if self.finger_ascending is not None:
-            chord_coords = self.get_chord_figure_coordenates()
-            for coord in chord_coords:
-                note = self.coordenate_to_note(coord)
-                note_colors = self.get_note_colors(note)
-                # Use scale degree as label
-                label = note_to_degree.get(note, '')
-                self.draw_note_at_coordenate(coord, *note_colors, label=label)
-    
+            for string_index, fret in enumerate(self.finger_ascending):
+                if fret is not None:
+                    fret_offset = fret + self.starting_fret - 1 if self.is_horizontal else fret
+                    coord, note, note_colors = note_table[string_index][fret_offset]
+                    # Use scale degree as label
+                    self.draw_note_at_coordenate(coord, *note_colors, label=note_to_degree[note])
+
         # Draw notes for the scale
         if self.scale is not None:
-            scale_coords = self.get_scale_figure_coordenates()
-            for coord in scale_coords:
-                note = self.coordenate_to_note(coord)
-                note_colors = self.get_note_colors(note)
-                # Use scale degree as label
-                label = note_to_degree.get(note, '')
-                self.draw_note_at_coordenate(coord, *note_colors, label=label)
+            scale_notes = set(self.calculate_scale_notes())
+            # The 0 fret (open string) is skipped if the diagram is vertical
+            first_fret_offset = 0 if self.is_horizontal else 1
+            for string_notes in note_table:
+                for coord, note, note_colors in string_notes[first_fret_offset:]:
+                    if note in scale_notes:
+                        self.draw_note_at_coordenate(coord, *note_colors, label=note_to_degree[note])
+
+    def get_note_degrees(self):
+        # Scale degree label of every note relative to the root
+        if self.root not in AbstractBuilder.note_degrees:
+            scale_degrees = ['I', '', 'II', '', 'III', 'IV', '', 'V', '', 'VI', '', 'VII']
+            root_index = self.all_notes.index(self.root)
+            AbstractBuilder.note_degrees[self.root] = {self.all_notes[(root_index + i) % len(self.all_notes)]: degree for i, degree in enumerate(scale_degrees)}
+        return AbstractBuilder.note_degrees[self.root]
+
+    def get_note_table(self):
+        # (coordenate, note, colours) of every string x fret position, as coordenate_to_note would compute them
+        key = (self.is_horizontal, tuple(self.notes_coordenates['strings']), tuple(self.notes_coordenates['frets']), self.starting_fret, tuple(sorted(self.note_colors.items())))
+        if key not in AbstractBuilder.note_tables:
+            note_table = []
+            for string_index, (string_coord, open_note) in enumerate(zip(self.notes_coordenates['strings'], self.open_string_notes)):
+                open_note_index = self.all_notes.index(open_note)
+                string_notes = []
+                for fret_offset, fret_coord in enumerate(self.notes_coordenates['frets']):
+                    coord = (fret_coord, string_coord) if self.is_horizontal else (string_coord, fret_coord)
+                    note = self.all_notes[(open_note_index + fret_offset + self.starting_fret - 1) % len(self.all_notes)]
+                    string_notes.append((coord, note, self.get_note_colors(note)))
+                note_table.append(string_notes)
+            AbstractBuilder.note_tables[key] = note_table
+        return AbstractBuilder.note_tables[key]
 
 
 
@@ -267,13 +391,8 @@ class ShortBuilder(AbstractBuilder):
 
 
     def write_starting_fret(self):
-        try:
-            font = ImageFont.truetype(self.font, 35)
-        except IOError:
-            font = ImageFont.load_default()
-
         starting_fret_text = str(self.starting_fret)
-        self.draw.text((30, 110), starting_fret_text, fill='black', font=font)
+        self.write_text((30, 110), starting_fret_text, 35)
 
 
 class LongBuilder(AbstractBuilder):
@@ -298,17 +417,12 @@ class LongBuilder(AbstractBuilder):
             self.draw.line(start_point + end_point, fill=color, width=self.line_thickness - 1)
 
     def write_starting_fret(self):
-        try:
-            font = ImageFont.truetype(self.font, 20)
-        except IOError:
-            font = ImageFont.load_default()
-
         for i, fret_start in enumerate(self.frets_starting_points, start=1):
             if i > 12:  # Only write numbers for frets 1 to 12
                 break
             fret_number_text = str(i)
             x_coordenate = fret_start + 15
             y_coordenate = 300
-            self.draw.text((x_coordenate, y_coordenate), fret_number_text, fill='black', font=font)
+            self.write_text((x_coordenate, y_coordenate), fret_number_text, 20)
 
 
@@ -0,0 +1,59 @@
+import hashlib
+import os
+from collections import OrderedDict
+from PIL import Image
+
+
+class DiagramCache:
+    # Rendered diagrams keyed by a hash of everything that affects their pixels.
+    # The cache keeps its own copies, so callers may draw on the images they put or get
+    def __init__(self, max_size=512, directory=None):
+        self.max_size = max_size
+        self.directory = directory
+        self._images = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def get_key(builder, root, starting_fret, finger_ascending=None, scale=None, name=None):
+        diagram = (root, starting_fret, tuple(finger_ascending) if finger_ascending is not None else None, tuple(scale) if scale is not None else None, name)
+        return hashlib.sha1(repr((builder.get_cache_key(), diagram)).encode()).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key):
+        if key in self._images:
+            self._images.move_to_end(key)
+            self.hits += 1
+            return self._images[key].copy()
+
+        if self.directory is not None and os.path.exists(self._get_path(key)):
+            with Image.open(self._get_path(key)) as stored_image:
+                image = stored_image.convert('RGB')
+            self.disk_hits += 1
+            self._remember(key, image.copy())
+            return image
+
+        self.misses += 1
+        return None
+
+    def put(self, key, image):
+        self._remember(key, image.copy())
+        # Only raster diagrams are kept on disk
+        if self.directory is not None and isinstance(image, Image.Image) and not os.path.exists(self._get_path(key)):
+            image.save(self._get_path(key))
+
+    def _remember(self, key, image):
+        self._images[key] = image
+        self._images.move_to_end(key)
+        while len(self._images) > self.max_size:
+            self._images.popitem(last=False)
+            self.evictions += 1
+
+    def get_stats(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._images)}
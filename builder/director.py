@@ -1,23 +1,61 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from guitar_chords.builder.cache import DiagramCache
 from guitar_chords.collection.resources.scales import scales
-from PIL import Image
+from PIL import Image, TiffImagePlugin
+
+# Builder owned by each process of a parallel build_multiple_chords
+_worker_director = None
+
+
+def _init_worker(builder_class, builder_settings):
+    global _worker_director
+    builder = builder_class()
+    builder.__dict__.update(builder_settings)
+    _worker_director = Director(builder)
+
+
+def _render_chord(chord_fields):
+    root, chord_type, starting_fret, finger_ascending = chord_fields
+    _worker_director._draw_diagram(root, starting_fret, finger_ascending=finger_ascending, name=f"{root}{chord_type}")
+    image = _worker_director._builder.get_result()
+    if isinstance(image, Image.Image):
+        return image.mode, image.size, image.tobytes()
+    # Non-raster results, such as SVG diagrams, are sent back as they are
+    return None, None, image
+
 
 class Director:
-    def __init__(self, builder):
+    # Chords a parallel render sends to the process pool at a time
+    render_window = 256
+
+    def __init__(self, builder, cache=None):
         self._builder = builder
+        # Optional DiagramCache shared by every diagram this director builds
+        self._cache = cache
         self._current_image = None
         self._composite_image = None
-        self._current_row_images = []
-        self._all_rows = []
 
     def _build_diagram(self, root, starting_fret, finger_ascending=None, scale=None, name=None):
-        self._builder.draw_boundaries()
+        if self._cache is not None:
+            key = DiagramCache.get_key(self._builder, root, starting_fret, finger_ascending=finger_ascending, scale=scale, name=name)
+            image = self._cache.get(key)
+            if image is not None:
+                self._builder.image = image
+                return
+        self._draw_diagram(root, starting_fret, finger_ascending=finger_ascending, scale=scale, name=name)
+        if self._cache is not None:
+            self._cache.put(key, self._builder.get_result())
+
+    def _draw_diagram(self, root, starting_fret, finger_ascending=None, scale=None, name=None):
         self._builder.root = root
         self._builder.starting_fret = starting_fret
         self._builder.finger_ascending = finger_ascending
         self._builder.scale = scale
+        self._builder.draw_fretboard()
         self._builder.write_starting_fret()
-        self._builder.draw_frets()
-        self._builder.draw_strings()
         self._builder.draw_notes()
         self._builder.write_name(name)
 
@@ -40,56 +78,151 @@ class Director:
 
     def _save_image(self):
         self._current_image = self._builder.get_result()
-        self._current_row_images.append(self._current_image)
 
-    def _concatenate_images(self, images, direction='horizontal'):
+    def _render_chords(self, chords, workers):
+        if workers <= 1:
+            for chord in chords:
+                self._build_diagram(chord.root, chord.starting_fret, finger_ascending=chord.finger_ascending, name=f"{chord.root}{chord.chord_type}")
+                yield self._builder.get_result()
+            return
+
+        # Each worker draws with its own copy of the builder, configured like this one
+        builder_settings = {key: value for key, value in self._builder.__dict__.items() if key not in ('image', 'draw')}
+        chords = iter(chords)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(type(self._builder), builder_settings)) as executor:
+            # Chords are sent in windows of render_window, the next one rendering while this one is yielded,
+            # so memory does not grow with the length of the input
+            previous = None
+            for window in iter(lambda: list(islice(chords, self.render_window)), []):
+                submitted = self._submit_window(executor, window, workers)
+                if previous is not None:
+                    yield from self._collect_window(*previous)
+                previous = submitted
+            if previous is not None:
+                yield from self._collect_window(*previous)
+
+    def _submit_window(self, executor, window, workers):
+        chord_fields = [(chord.root, chord.chord_type, chord.starting_fret, chord.finger_ascending) for chord in window]
+
+        # Only diagrams missing from the cache are sent to the workers
+        images = [None] * len(chord_fields)
+        keys = list(range(len(chord_fields)))
+        if self._cache is not None:
+            for index, (root, chord_type, starting_fret, finger_ascending) in enumerate(chord_fields):
+                keys[index] = DiagramCache.get_key(self._builder, root, starting_fret, finger_ascending=finger_ascending, name=f"{root}{chord_type}")
+                images[index] = self._cache.get(keys[index])
+
+        # Repeated shapes within the window are rendered once
+        missing = {}
+        for index, image in enumerate(images):
+            if image is None:
+                missing.setdefault(keys[index], index)
+
+        chunksize = max(1, len(missing) // (workers * 4))
+        rendered = executor.map(_render_chord, [chord_fields[index] for index in missing.values()], chunksize=chunksize)
+        return images, keys, rendered
+
+    def _collect_window(self, images, keys, rendered):
+        # Rendered images are held only until their last repetition is yielded
+        remaining_uses = Counter(keys[index] for index, image in enumerate(images) if image is None)
+        rendered_images = {}
+        for index, image in enumerate(images):
+            if image is None:
+                key = keys[index]
+                if key not in rendered_images:
+                    mode, size, data = next(rendered)
+                    rendered_images[key] = Image.frombytes(mode, size, data) if mode is not None else data
+                    if self._cache is not None:
+                        self._cache.put(key, rendered_images[key])
+                image = rendered_images[key]
+                remaining_uses[key] -= 1
+                if not remaining_uses[key]:
+                    del rendered_images[key]
+            images[index] = None
+            yield image
+
+    def build_multiple_chords(self, chords, columns=4, workers=1):
         """
-        Concatenate a list of images in the specified direction.
+        Build multiple chord images into one sheet.
+        With workers > 1 the diagrams are drawn in a process pool and assembled here.
         """
-        widths, heights = zip(*(i.size for i in images))
-
-        if direction == 'horizontal':
-            total_width = sum(widths)
-            max_height = max(heights)
-            combined_image = Image.new('RGB', (total_width, max_height), 'white')  # white background
-            x_offset = 0
-            for im in images:
-                combined_image.paste(im, (x_offset, 0))
-                x_offset += im.width
-        else:  # vertical concatenation
-            total_height = sum(heights)
-            max_width = max(widths)
-            combined_image = Image.new('RGB', (max_width, total_height), 'white')  # white background
-            y_offset = 0
-            for im in images:
-                combined_image.paste(im, (0, y_offset))
-                y_offset += im.height
-        return combined_image
-
-    def build_multiple_chords(self, chords, columns=4):
+        chords = list(chords)
+        if not chords:
+            print("No chords were processed to create an image.")
+            return
+
+        # Every diagram is pasted straight into its cell of a single preallocated sheet
+        cell_width, cell_height = self._builder.image_size
+        rows = -(-len(chords) // columns)
+        self._composite_image = self._builder.new_sheet((min(len(chords), columns) * cell_width, rows * cell_height))
+        for index, image in enumerate(self._render_chords(chords, workers)):
+            row, column = divmod(index, columns)
+            self._composite_image.paste(image, (column * cell_width, row * cell_height))
+            self._current_image = image
+
+    def build_pages(self, chords, columns=4, rows_per_page=10, workers=1):
         """
-        Build and concatenate multiple chord images.
+        Yield the chord sheet as pages of at most rows_per_page rows.
+        Each page is yielded as soon as it is complete, so only one page is held at a time.
         """
-        self._current_row_images = []  # Resetting the current row images
-        self._all_rows = []            # Resetting all rows
+        cell_width, cell_height = self._builder.image_size
+        chords_per_page = columns * rows_per_page
+        page = None
+        for index, image in enumerate(self._render_chords(chords, workers)):
+            cell = index % chords_per_page
+            if cell == 0:
+                if page is not None:
+                    yield page
+                page = self._builder.new_sheet((columns * cell_width, rows_per_page * cell_height))
+            row, column = divmod(cell, columns)
+            page.paste(image, (column * cell_width, row * cell_height))
+            self._current_image = image
+            last_row = row
 
-        for chord in chords:
-            self.build_chord(chord)
-            if len(self._current_row_images) == columns:
-                self._all_rows.append(self._concatenate_images(self._current_row_images, 'horizontal'))
-                self._current_row_images = []
+        # The last page is cropped to the rows it actually holds
+        if page is not None:
+            yield page.crop((0, 0, page.width, (last_row + 1) * cell_height))
 
-        # Handle remaining chords
-        if self._current_row_images:
-            self._all_rows.append(self._concatenate_images(self._current_row_images, 'horizontal'))
+    def save_pages(self, chords, file_path, columns=4, rows_per_page=10, workers=1):
+        """
+        Write the chord sheet page by page and return the number of pages.
+        .pdf and .tif/.tiff paths get one multi-page file, any other path a PNG-style
+        series where '{page}' in the path is replaced by the page number.
+        SVG builders only write series of .svg files.
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if self._builder.image_format == 'svg' and extension != '.svg':
+            raise ValueError(f"{type(self._builder).__name__} draws SVG pages, which cannot be saved as {extension or 'a file without extension'}; use a .svg path")
+        pages = self.build_pages(chords, columns=columns, rows_per_page=rows_per_page, workers=workers)
+        page_count = 0
 
-        if self._all_rows:
-            self._composite_image = self._concatenate_images(self._all_rows, 'vertical')
+        if extension in ('.tif', '.tiff'):
+            with TiffImagePlugin.AppendingTiffWriter(file_path, new=True) as tiff:
+                for page in pages:
+                    page.save(tiff, format='TIFF')
+                    tiff.newFrame()
+                    page_count += 1
+        elif extension == '.pdf':
+            for page in pages:
+                page.save(file_path, append=page_count > 0)
+                page_count += 1
         else:
+            if '{page}' not in file_path:
+                root, extension = os.path.splitext(file_path)
+                file_path = root + '_{page}' + extension
+            for page in pages:
+                page.save(file_path.format(page=page_count + 1))
+                page_count += 1
+
+        if not page_count:
             print("No chords were processed to create an image.")
+        return page_count
+
+    def get_image(self):
+        return self._composite_image if self._composite_image else self._current_image
 
     def save_image(self, file_path):
-        image_to_save = self._composite_image if self._composite_image else self._current_image
+        image_to_save = self.get_image()
         if image_to_save:
             image_to_save.save(file_path)
         else:
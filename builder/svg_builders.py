@@ -0,0 +1,130 @@
+import hashlib
+from xml.sax.saxutils import escape
+from guitar_chords.builder.builders import ShortBuilder, LongBuilder
+
+
+def _svg_color(color):
+    if isinstance(color, tuple):
+        return f"rgb({color[0]},{color[1]},{color[2]})"
+    return color
+
+
+class SvgImage:
+    # SVG counterpart of a PIL image: shared <defs> plus the elements that use them
+    def __init__(self, size):
+        self.size = size
+        self.defs = {}
+        self.elements = []
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    def paste(self, image, position):
+        self.defs.update(image.defs)
+        self.elements.append(f'<g transform="translate({position[0]},{position[1]})">{"".join(image.elements)}</g>')
+
+    def copy(self):
+        image = SvgImage(self.size)
+        image.defs = dict(self.defs)
+        image.elements = list(self.elements)
+        return image
+
+    def crop(self, box):
+        # Only crops anchored at the top left corner are needed to trim sheets
+        cropped = SvgImage((box[2] - box[0], box[3] - box[1]))
+        cropped.defs = self.defs
+        cropped.elements = self.elements if box[:2] == (0, 0) else [f'<g transform="translate({-box[0]},{-box[1]})">{"".join(self.elements)}</g>']
+        return cropped
+
+    def tostring(self):
+        width, height = self.size
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<defs>{"".join(self.defs.values())}</defs>'
+            f'<rect width="{width}" height="{height}" fill="white"/>'
+            f'{"".join(self.elements)}</svg>'
+        )
+
+    def save(self, file_path):
+        with open(file_path, "w") as svg_file:
+            svg_file.write(self.tostring())
+
+    def _repr_svg_(self):
+        return self.tostring()
+
+
+class SvgDraw:
+    # Collects the lines that ShortBuilder and LongBuilder draw with ImageDraw.line
+    def __init__(self):
+        self.elements = []
+
+    def line(self, xy, fill='black', width=1):
+        (x1, y1), (x2, y2) = xy if len(xy) == 2 else (xy[:2], xy[2:])
+        self.elements.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{_svg_color(fill)}" stroke-width="{width}"/>')
+
+
+class SvgBuilderMixin:
+    # Emits SVG with the geometry of the raster builder it is mixed into
+    font_family = "Times New Roman, Times, serif"
+    image_format = "svg"
+    # Rendered <defs> entries keyed by id, shared by every SVG builder in the process
+    svg_defs = {}
+
+    def _get_def_id(self, prefix, key):
+        return f"{prefix}-{hashlib.sha1(repr((self.get_cache_key(), key)).encode()).hexdigest()[:12]}"
+
+    def _use(self, def_id, coordenate=(0, 0)):
+        self.image.defs[def_id] = SvgBuilderMixin.svg_defs[def_id]
+        self.image.elements.append(f'<use xlink:href="#{def_id}" x="{coordenate[0]}" y="{coordenate[1]}"/>')
+
+    def draw_boundaries(self):
+        self.image = SvgImage(self.image_size)
+        self.draw = SvgDraw()
+
+    def new_sheet(self, size):
+        return SvgImage(size)
+
+    def draw_fretboard(self):
+        self.draw_boundaries()
+        fretboard_id = self._get_def_id("fretboard", self._get_fretboard_key()[-1])
+        if fretboard_id not in SvgBuilderMixin.svg_defs:
+            self.draw_frets()
+            self.draw_strings()
+            SvgBuilderMixin.svg_defs[fretboard_id] = f'<g id="{fretboard_id}">{"".join(self.draw.elements)}</g>'
+        self._use(fretboard_id)
+
+    def draw_note_at_coordenate(self, coordenate, color_a, color_b, label=''):
+        note_id = self._get_def_id("note", (self.is_horizontal, color_a, color_b, label))
+        if note_id not in SvgBuilderMixin.svg_defs:
+            radius = 15
+            if color_b is None:
+                shape = f'<circle r="{radius}" fill="{_svg_color(color_a)}"/>'
+            else:
+                # Two half discs split along the same diagonal as the raster pie slices
+                rotation_angle = 45 if self.is_horizontal else 135
+                half_disc = f'M 0 0 L {radius} 0 A {radius} {radius} 0 0 1 {-radius} 0 Z'
+                shape = (
+                    f'<g transform="rotate({rotation_angle})">'
+                    f'<path d="{half_disc}" fill="{_svg_color(color_a)}"/>'
+                    f'<path d="{half_disc}" fill="{_svg_color(color_b)}" transform="rotate(180)"/></g>'
+                )
+            if label:
+                shape += f'<text y="-3" font-family="{self.font_family}" font-size="{int(radius * 1.2)}" text-anchor="middle" dominant-baseline="central">{escape(label)}</text>'
+            SvgBuilderMixin.svg_defs[note_id] = f'<g id="{note_id}">{shape}</g>'
+        self._use(note_id, coordenate)
+
+    def write_text(self, coordenate, text, font_size):
+        self.image.elements.append(f'<text x="{coordenate[0]}" y="{coordenate[1]}" font-family="{self.font_family}" font-size="{font_size}" dominant-baseline="hanging">{escape(text)}</text>')
+
+
+class SvgShortBuilder(SvgBuilderMixin, ShortBuilder):
+    pass
+
+
+class SvgLongBuilder(SvgBuilderMixin, LongBuilder):
+    pass
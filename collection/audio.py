@@ -0,0 +1,61 @@
+import wave
+import numpy as np
+from guitar_chords.collection.columnar import ColumnarChordCollection, MUTED
+
+
+def get_frequency_matrix(chords):
+    # (chords x 6) matrix of string frequencies in Hz, NaN where the string is muted
+    if isinstance(chords, ColumnarChordCollection):
+        return chords.get_frequencies()
+    chords = list(chords)
+    strings = np.array([[MUTED if fret is None else fret for fret in chord.finger_ascending] for chord in chords], dtype=np.int16).reshape(-1, 6)
+    starting_frets = np.array([chord.starting_fret for chord in chords], dtype=np.int16)
+    return ColumnarChordCollection.calculate_frequencies(strings, starting_frets)
+
+
+def synthesize_strums(frequencies, sample_rate=22050, duration=1.5, strum_delay=0.03, decay=3.0, chunk_size=256):
+    # One float32 waveform per row of a frequency matrix, strummed down from the 6th string
+    # with strum_delay seconds between strings and an exponential decay; muted strings are silent
+    frequencies = np.asarray(frequencies, dtype=np.float64).reshape(-1, 6)
+    sample_count = int(sample_rate * duration)
+    waveforms = np.empty((len(frequencies), sample_count), dtype=np.float32)
+    times = np.arange(sample_count) / sample_rate
+
+    sounding = ~np.isnan(frequencies)
+    string_counts = np.maximum(sounding.sum(axis=1), 1).astype(np.float32)
+
+    # A string only takes a couple dozen frequencies across a collection, so each distinct
+    # tone is synthesised once and chords are sums of rows of these tables
+    tone_tables = []
+    tone_ids = []
+    for string_index in range(6):
+        string_time = np.maximum(times - (5 - string_index) * strum_delay, 0)
+        envelope = np.where(times >= (5 - string_index) * strum_delay, np.exp(-decay * string_time), 0)
+        string_frequencies, string_tone_ids = np.unique(np.where(sounding[:, string_index], frequencies[:, string_index], 0), return_inverse=True)
+        tones = (np.sin(2 * np.pi * string_frequencies[:, None] * string_time) * envelope).astype(np.float32)
+        tones[string_frequencies == 0] = 0
+        tone_tables.append(tones)
+        tone_ids.append(string_tone_ids.reshape(-1))
+
+    # Chords are summed chunk_size at a time to bound the temporary arrays
+    for start in range(0, len(frequencies), chunk_size):
+        stop = min(start + chunk_size, len(frequencies))
+        chunk = tone_tables[0][tone_ids[0][start:stop]]
+        for tones, string_tone_ids in zip(tone_tables[1:], tone_ids[1:]):
+            chunk += tones[string_tone_ids[start:stop]]
+        waveforms[start:stop] = chunk / string_counts[start:stop, None]
+    return waveforms
+
+
+def synthesize_chords(chords, **synthesis_settings):
+    return synthesize_strums(get_frequency_matrix(chords), **synthesis_settings)
+
+
+def save_wav(waveform, file_path, sample_rate=22050):
+    # 16-bit mono WAV of a waveform in [-1, 1], e.g. one row of synthesize_strums
+    samples = (np.clip(waveform, -1, 1) * 32767).astype('<i2')
+    with wave.open(file_path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
@@ -1,89 +1,185 @@
+from guitar_chords.collection.resources.scales import scales
 
 class GuitarChord:
     all_notes = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
     open_string_notes = ["E", "B", "G", "D", "A", "E"]
+    # Open string frequencies in Hz, 1st to 6th string
+    open_string_frequencies = [329.63, 246.94, 196, 146.83, 110, 82.41]
+    # Fret to frequency ratio, filled for the first 24 frets below
+    fret_ratios = {}
+    # Pitch-class masks of scales, keyed by (tonic, tuple(scale))
+    scale_masks = {}
+    # Frozen sets of transposable figures keyed by id(list), stored as (list, length, frozenset)
+    figure_sets = {}
+    # No per-instance __dict__, a library holds millions of chords
+    __slots__ = ("_root", "_chord_type", "_starting_fret", "_finger_ascending", "transposable_figures", "_cache", "_owners")
 
     def __init__(self, root, chord_type, transposable_figures, *, starting_fret=0, finger_ascending):
-        self.root = root
-        self.chord_type = chord_type
-        self.starting_fret = starting_fret
-        self.finger_ascending = finger_ascending
+        self._root = root
+        self._chord_type = chord_type
+        self._starting_fret = starting_fret
+        # Kept as a tuple, so the fingers cannot change in place behind the cached features
+        self._finger_ascending = tuple(finger_ascending)
         self.transposable_figures = transposable_figures
+        # Derived features computed on first access, cleared whenever the chord changes
+        self._cache = {}
+        # Owners of the collections that indexed the chord, whose versions change with it; scratch copies have none
+        self._owners = ()
 
     def __str__(self):
-        return f"({repr(self.root)}, {repr(self.chord_type)}, finger_ascending={self.finger_ascending}, starting_fret={self.starting_fret})"
+        return f"({repr(self.root)}, {repr(self.chord_type)}, finger_ascending={list(self.finger_ascending)}, starting_fret={self.starting_fret})"
+
+    # Setting any of these clears the derived features
+    @property
+    def root(self):
+        return self._root
+
+    @root.setter
+    def root(self, root):
+        self._root = root
+        self._changed()
+
+    @property
+    def chord_type(self):
+        return self._chord_type
+
+    @chord_type.setter
+    def chord_type(self, chord_type):
+        self._chord_type = chord_type
+        self._changed()
+
+    @property
+    def starting_fret(self):
+        return self._starting_fret
+
+    @starting_fret.setter
+    def starting_fret(self, starting_fret):
+        self._starting_fret = starting_fret
+        self._changed()
+
+    @property
+    def finger_ascending(self):
+        return self._finger_ascending
+
+    @finger_ascending.setter
+    def finger_ascending(self, finger_ascending):
+        self._finger_ascending = tuple(finger_ascending)
+        self._changed()
+
+    def get_key(self):
+        return (self._root, self._chord_type, self._starting_fret, self._finger_ascending)
+
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
+
+    def _clear_cache(self):
+        self._cache.clear()
+
+    def _changed(self):
+        self._clear_cache()
+        for owner in self._owners:
+            owner.version += 1
 
     def calculate_frequencies(self):
+        return dict(self._cached("frequencies", self._calculate_frequencies))
+
+    def _calculate_frequencies(self):
         frequencies = {}
-        base_frequencies = {
-            "E": [329.63, 82.41],  # 1st and 6th strings
-            "B": [246.94],         # 2nd string
-            "G": [196],            # 3rd string
-            "D": [146.83],         # 4th string
-            "A": [110]             # 5th string
-        }
-
-        def calculate_frequency(open_note, string_number, fret_position):
-            base_frequency = base_frequencies[open_note][0] if string_number != 6 else base_frequencies[open_note][1]
-            return base_frequency * (2 ** (fret_position / 12))
-
-        for string_number, (open_note, finger_position) in enumerate(zip(GuitarChord.open_string_notes, self.finger_ascending), start=1):
+        for string_number, finger_position in enumerate(self.finger_ascending, start=1):
             if finger_position is None:
                 continue
 
             fret_position = self.starting_fret + finger_position - 1 if finger_position > 0 else 0
-            frequency = calculate_frequency(open_note, string_number, fret_position)
-            frequencies[string_number] = frequency
+            frequencies[string_number] = GuitarChord.open_string_frequencies[string_number - 1] * GuitarChord.get_fret_ratio(fret_position)
 
         return frequencies
 
+    @staticmethod
+    def get_fret_ratio(fret):
+        # Frequency ratio of a fret to the open string, 2 ** (fret / 12)
+        if fret not in GuitarChord.fret_ratios:
+            GuitarChord.fret_ratios[fret] = 2 ** (fret / 12)
+        return GuitarChord.fret_ratios[fret]
 
-    def get_notes(self, include_strings=False):
-        def calculate_note(string, fret):
-            if fret is None:
-                return None
-            if fret == 0:  # For open strings, return the default open string note
-                return string
-            # Calculate the note for fretted strings
-            note_index = (GuitarChord.all_notes.index(string) + self.starting_fret + fret - 1) % len(GuitarChord.all_notes)
-            return GuitarChord.all_notes[note_index]
 
+    def _calculate_note(self, string, fret):
+        if fret is None:
+            return None
+        if fret == 0:  # For open strings, return the default open string note
+            return string
+        # Calculate the note for fretted strings
+        note_index = (GuitarChord.all_notes.index(string) + self.starting_fret + fret - 1) % len(GuitarChord.all_notes)
+        return GuitarChord.all_notes[note_index]
+
+    def get_notes(self, include_strings=False):
         if include_strings:
             notes = {}
             for string_number, (string, fret) in enumerate(zip(GuitarChord.open_string_notes, self.finger_ascending), start=1):
-                note = calculate_note(string, fret)
+                note = self._calculate_note(string, fret)
                 notes[string_number] = note
             return notes
         else:
-            frequencies = self.calculate_frequencies()
-            notes = [calculate_note(string, fret) for string, fret in zip(GuitarChord.open_string_notes, self.finger_ascending) if fret is not None]
-            unique_notes = list(dict.fromkeys(notes))  # Remove duplicates
+            return list(self._cached("notes", self._calculate_ordered_notes))
+
+    def _calculate_ordered_notes(self):
+        frequencies = self.calculate_frequencies()
+        notes = [self._calculate_note(string, fret) for string, fret in zip(GuitarChord.open_string_notes, self.finger_ascending) if fret is not None]
+        unique_notes = list(dict.fromkeys(notes))  # Remove duplicates
+
+        # Correctly map notes to string numbers for sorting
+        note_to_string = {}
+        for idx, (string, fret) in enumerate(zip(GuitarChord.open_string_notes, self.finger_ascending), start=1):
+            if fret is not None:
+                note = self._calculate_note(string, fret)
+                note_to_string[note] = idx
+
+        # Sort notes based on frequencies
+        return sorted(unique_notes, key=lambda note: frequencies.get(note_to_string.get(note), float('inf')))
 
-            # Correctly map notes to string numbers for sorting
-            note_to_string = {}
-            for idx, (string, fret) in enumerate(zip(GuitarChord.open_string_notes, self.finger_ascending), start=1):
-                if fret is not None:
-                    note = calculate_note(string, fret)
-                    note_to_string[note] = idx
+    def get_pitch_class_mask(self):
+        # 12-bit mask with bit i set when GuitarChord.all_notes[i] sounds in the chord
+        return self._cached("pitch_class_mask", lambda: sum(1 << GuitarChord.all_notes.index(note) for note in self.get_notes()))
 
-            # Sort notes based on frequencies
-            return sorted(unique_notes, key=lambda note: frequencies.get(note_to_string.get(note), float('inf')))
+    def get_string_mask(self):
+        # 6-bit mask with bit i set when string i + 1 is played
+        return self._cached("string_mask", lambda: sum(1 << string_index for string_index, fret in enumerate(self.finger_ascending) if fret is not None))
 
+    def get_inversion(self):
+        return self._cached("inversion", self._calculate_inversion)
+
+    def _calculate_inversion(self):
+        return GuitarChord.calculate_inversion(self.get_notes(), self.root)
+
+    @staticmethod
+    def calculate_inversion(notes, root):
+        # Determine the inversion based on the position of the root note in notes ordered from the bass
+        if root in notes:
+            root_position = notes.index(root)
+            if root_position == 0:  # Root is the first note
+                return 1
+            elif root_position == 1:  # Root is the second note
+                return 2
+            else:  # Root is in any other position
+                return 3
+        return None
 
 
     def is_open(self):
-        return 0 in self.finger_ascending
+        return self._cached("is_open", lambda: 0 in self.finger_ascending)
 
     def transpose(self, distance):
         # Helper function to transpose figure
         def transpose_figure(lst, num):
-            return [item + num if item is not None else None for item in lst]
+            return tuple(item + num if item is not None else None for item in lst)
 
         # Helper function to raise specific errors after reverting changes
         def raise_transpose_error(error_type):
-            self.root = original_root
-            self.finger_ascending = original_finger_ascending
-            self.starting_fret = original_starting_fret
+            self._root = original_root
+            self._finger_ascending = original_finger_ascending
+            self._starting_fret = original_starting_fret
+            self._clear_cache()
 
             error_messages = {
                 "below_0": "Chord transposition results in a note below the 0th fret.",
@@ -92,38 +188,38 @@ class GuitarChord:
             }
             raise ValueError(error_messages[error_type])
 
-        # Save original state for possible reversion
-        original_root = self.root
-        original_finger_ascending = self.finger_ascending.copy()
-        original_starting_fret = self.starting_fret
+        # Save original state for possible reversion, the fields are set directly so the chord only counts as changed once
+        original_root = self._root
+        original_finger_ascending = self._finger_ascending
+        original_starting_fret = self._starting_fret
 
         # Return if distance is zero
         if distance == 0:
             return
 
         # Update root note
-        new_note_index = (GuitarChord.all_notes.index(self.root) + distance) % len(GuitarChord.all_notes)
-        self.root = GuitarChord.all_notes[new_note_index]
+        new_note_index = (GuitarChord.all_notes.index(self._root) + distance) % len(GuitarChord.all_notes)
+        self._root = GuitarChord.all_notes[new_note_index]
 
         # Transpose open chords
         if self.is_open():
             if distance < 0:
                 raise_transpose_error("below_0")
             elif distance > 0:
-                self.finger_ascending = transpose_figure(self.finger_ascending, 1)
-                self.starting_fret = max(0, self.starting_fret + distance - 1)
+                self._finger_ascending = transpose_figure(self._finger_ascending, 1)
+                self._starting_fret = max(0, self._starting_fret + distance - 1)
         else:  # Transpose barre chords
             if distance < 0:
-                new_starting_fret = self.starting_fret + distance
+                new_starting_fret = self._starting_fret + distance
                 if new_starting_fret < 0:
                     raise_transpose_error("below_0")
                 elif new_starting_fret == 0:
-                    self.finger_ascending = transpose_figure(self.finger_ascending, -1)
-                    self.starting_fret = 1  # Keeping the fret at 1
+                    self._finger_ascending = transpose_figure(self._finger_ascending, -1)
+                    self._starting_fret = 1  # Keeping the fret at 1
                 else:
-                    self.starting_fret = new_starting_fret
+                    self._starting_fret = new_starting_fret
             else:  # Transpose barre chord to the right
-                self.starting_fret += distance
+                self._starting_fret += distance
 
         # Check for errors in transposition
         if any(fret < 0 for fret in self.finger_ascending if fret is not None):
@@ -133,21 +229,71 @@ class GuitarChord:
 
         # Check transposability
         transposed_figure = self.finger_ascending if self.starting_fret == 0 else transpose_figure(self.finger_ascending, 1)
-        if transposed_figure not in self.transposable_figures:
+        if transposed_figure not in GuitarChord.get_figure_set(self.transposable_figures):
             raise_transpose_error("not_equivalent_transposable_figure")
 
-    def validate_against_scale(self, tonic, scale):
-        # Reorder the all_notes list starting from the tonic
+        self._changed()
+
+    @staticmethod
+    def get_figure_set(transposable_figures):
+        # Rebuilt when the list is replaced or grows
+        cached = GuitarChord.figure_sets.get(id(transposable_figures))
+        if cached is None or cached[0] is not transposable_figures or cached[1] != len(transposable_figures):
+            cached = (transposable_figures, len(transposable_figures), frozenset(tuple(figure) for figure in transposable_figures))
+            GuitarChord.figure_sets[id(transposable_figures)] = cached
+        return cached[2]
+
+    def get_transpositions(self):
+        # Every chord transpose(1), transpose(2), ... would produce on a copy, up to the first failing distance
+        def transpose_figure(lst, num):
+            return tuple(item + num if item is not None else None for item in lst)
+
+        is_open = self.is_open()
+        fingers = transpose_figure(self.finger_ascending, 1) if is_open else self.finger_ascending
+        if any(fret < 0 for fret in fingers if fret is not None):
+            return []
+
+        # The figure check only depends on whether the new starting fret is 0
+        figure_set = GuitarChord.get_figure_set(self.transposable_figures)
+        valid_at_fret_0 = fingers in figure_set
+        valid_above_fret_0 = transpose_figure(fingers, 1) in figure_set
+
+        root_index = GuitarChord.all_notes.index(self.root)
+        transpositions = []
+        distance = 1
+        while True:
+            starting_fret = max(0, self.starting_fret + distance - 1) if is_open else self.starting_fret + distance
+            if starting_fret > 9 or not (valid_at_fret_0 if starting_fret == 0 else valid_above_fret_0):
+                return transpositions
+            root = GuitarChord.all_notes[(root_index + distance) % len(GuitarChord.all_notes)]
+            transpositions.append(GuitarChord(root, self.chord_type, self.transposable_figures, finger_ascending=fingers, starting_fret=starting_fret))
+            distance += 1
+
+    @staticmethod
+    def calculate_scale_mask(tonic, scale):
         tonic_index = GuitarChord.all_notes.index(tonic)
-        reordered_notes = GuitarChord.all_notes[tonic_index:] + GuitarChord.all_notes[:tonic_index]
+        mask = 0
+        for interval in scale:
+            mask |= 1 << ((tonic_index + interval) % len(GuitarChord.all_notes))
+        return mask
 
-        # Extract the notes of the scale using the provided scale pattern
-        scale_notes = [reordered_notes[i] for i in scale]
+    @staticmethod
+    def get_scale_mask(tonic, scale):
+        key = (tonic, tuple(scale))
+        if key not in GuitarChord.scale_masks:
+            GuitarChord.scale_masks[key] = GuitarChord.calculate_scale_mask(tonic, scale)
+        return GuitarChord.scale_masks[key]
 
-        # Get the notes of the chord
-        chord_notes = self.get_notes()
+    def validate_against_scale(self, tonic, scale):
+        # The chord fits the scale when none of its pitch classes fall outside it
+        return (self.get_pitch_class_mask() & ~GuitarChord.get_scale_mask(tonic, scale)) == 0
 
-        # Check if all chord notes are in the scale
-        return all(note in scale_notes for note in chord_notes)
 
+# Precompute the ratios of the first 24 frets
+for _fret in range(25):
+    GuitarChord.get_fret_ratio(_fret)
 
+# Precompute the masks of every tonic and mode in resources/scales.py
+for _tonic in GuitarChord.all_notes:
+    for _scale in scales.values():
+        GuitarChord.get_scale_mask(_tonic, _scale)
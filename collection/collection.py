@@ -1,30 +1,172 @@
+import heapq
 import sqlite3
+import weakref
+from itertools import count, islice
 from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.compact import CompactChord
+from guitar_chords.collection.resources.scales import scales
 from guitar_chords.collection.resources.transposable_figures import transposable_figures
 
+class ChordList(list):
+    # List that takes a new version on every change, so the indexes built over it know when they are stale
+    versions = count()
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.version = next(ChordList.versions)
+
+
+def _bump_version(name):
+    method = getattr(list, name)
+
+    def changing_method(self, *args, **kwargs):
+        self.version = next(ChordList.versions)
+        return method(self, *args, **kwargs)
+    return changing_method
+
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse"):
+    setattr(ChordList, _name, _bump_version(_name))
+
+
+class ChordOwner:
+    # Shared by the chords a collection indexed, GuitarChord bumps its version whenever one of them changes in place
+    __slots__ = ("version", "collection")
+
+    def __init__(self, collection=None):
+        self.version = 0
+        # Weak, so chords outliving the collection do not keep it alive
+        self.collection = weakref.ref(collection) if collection is not None else None
+
+    def is_alive(self):
+        return self.collection is not None and self.collection() is not None
+
+    def __reduce__(self):
+        # Pickled chords leave their collections behind
+        return (ChordOwner, ())
+
+
 class ChordCollection:
-    def __init__(self):
-        self.chords = []
+    # Criteria of only() answered from secondary indexes, mapped to the chord value they index
+    indexed_criteria = {
+        "root": lambda chord: chord.root,
+        "chord_type": lambda chord: chord.chord_type,
+        "open": lambda chord: chord.is_open(),
+        "starting_fret": lambda chord: chord.starting_fret,
+        "include_string": lambda chord: chord.get_string_mask(),
+        "inversion": lambda chord: chord.get_inversion(),
+    }
+    # Harmonic numbers H(n) at index n, extended on demand by get_tonality_frets
+    harmonic_numbers = [0]
+    # Frets counted by get_tonality, assuming a 12-fret guitar
+    tonality_frets = 12
 
-    def load(self, db_path):
+    def __init__(self):
+        self.chords = ChordList()
+        # Canonical keys of the chords in self.chords, used for O(1) dedup, built on first use
+        self._chord_keys = None
+        # Handed to the chords this collection indexes, see ChordOwner
+        self._owner = ChordOwner(self)
+        self._owners = (self._owner,)
+        # Version of self.chords and of the chords themselves the indexes were built from
+        self._indexed_version = None
+        # Secondary indexes {criterion: {value: set of positions in self.chords}}, built on first query
+        self._postings = {}
+        # Barre chords per {root: {pitch-class mask: count per starting fret}}, built on first tonality query
+        self._tonality_histogram = None
+        # Prefix sums of the histogram per (root, scale mask)
+        self._tonality_prefix_sums = {}
+        # Database rows the chords were last loaded from or saved to, {id(chord): (chord, row ID, key)};
+        # None after a compact load, whose chords cannot change in place
+        self._db_path = None
+        self._stored_chords = {}
+
+    @property
+    def chords(self):
+        """
+        The chords of the collection, a ChordList the indexes follow.
+        Assigning a plain list copies it: later changes to that list are not seen by the collection,
+        so change self.chords itself instead.
+        """
+        return self._chords
+
+    @chords.setter
+    def chords(self, chords):
+        # Any list assigned is copied into a ChordList, whose changes the indexes can see
+        self._chords = chords if isinstance(chords, ChordList) else ChordList(chords)
+
+    def get_version(self):
+        # Changes whenever self.chords is modified or one of its chords changes in place
+        return (self._chords.version, self._owner.version)
+
+    def load(self, db_path, compact=False):
         self.chords.clear()
+        self._stored_chords = None if compact else {}
+        self._db_path = db_path
         connection = sqlite3.connect(db_path)
         cursor = connection.cursor()
 
-        cursor.execute('SELECT ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6 FROM TABLE_CHORDS')
-        rows = cursor.fetchall()
+        cursor.execute('SELECT ID, ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6 FROM TABLE_CHORDS')
 
-        for row in rows:
-            root, chord_type, starting_fret, *fingers = row
-            chord = GuitarChord(root, chord_type, transposable_figures, finger_ascending=fingers, starting_fret=starting_fret)
-            self.chords.append(chord)
+        # Filled as a plain list, then added to self.chords at once
+        chords = []
+        for row in cursor:
+            row_id, root, chord_type, starting_fret, *fingers = row
+            if compact:
+                chord = CompactChord(root, chord_type, finger_ascending=fingers, starting_fret=starting_fret)
+            else:
+                chord = GuitarChord(root, chord_type, transposable_figures, finger_ascending=fingers, starting_fret=starting_fret)
+                self._stored_chords[id(chord)] = (chord, row_id, chord.get_key())
+            chords.append(chord)
+        self.chords.extend(chords)
 
         connection.close()
+        self._index_chords()
 
-    def save(self, db_name):
+    @staticmethod
+    def iter_chords(db_path, batch_size=1000, as_rows=False):
+        # Yields the stored chords while holding at most batch_size rows in memory
+        connection = sqlite3.connect(db_path)
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6 FROM TABLE_CHORDS ORDER BY ID')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    if as_rows:
+                        yield row
+                    else:
+                        root, chord_type, starting_fret, *fingers = row
+                        yield GuitarChord(root, chord_type, transposable_figures, finger_ascending=fingers, starting_fret=starting_fret)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def save_chords(chords, db_name, batch_size=1000):
+        # Streaming counterpart of save() for any iterable of chords, e.g. from iter_chords
         connection = sqlite3.connect(db_name)
         cursor = connection.cursor()
 
+        rows = ((chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending) for chord in chords)
+        with connection:
+            ChordCollection._create_schema(cursor)
+            # The identity index deduplicates rows that are never all held in memory
+            ChordCollection._create_indexes(cursor)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', batch)
+
+        connection.close()
+
+    @staticmethod
+    def _create_schema(cursor):
         # Create the table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS TABLE_CHORDS (
@@ -41,155 +183,318 @@ class ChordCollection:
             )
         ''')
 
-        # Insert the chords
-        for chord in self.chords:
+    @staticmethod
+    def _create_indexes(cursor):
+        # Returns the number of duplicated rows removed from a table written by an earlier version
+        removed_rows = 0
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'CHORD_IDENTITY'")
+        if cursor.fetchone() is None:
+            # Tables written by earlier versions may hold duplicated chords, keep the first copy
             cursor.execute('''
-                INSERT INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending))
-
-        connection.commit()
-        connection.close()
-
-    def chord_exists(self, new_chord):
-        for chord in self.chords:
-            if chord.root == new_chord.root and chord.chord_type == new_chord.chord_type and chord.starting_fret == new_chord.starting_fret and chord.finger_ascending == new_chord.finger_ascending:
-                return True
-        return False
+                DELETE FROM TABLE_CHORDS WHERE ID NOT IN (
+                    SELECT MIN(ID) FROM TABLE_CHORDS
+                    GROUP BY ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6
+                )
+            ''')
+            removed_rows = cursor.rowcount
+            # Muted strings are NULL, which UNIQUE would treat as all distinct
+            cursor.execute('''
+                CREATE UNIQUE INDEX CHORD_IDENTITY ON TABLE_CHORDS (
+                    ROOT, TYPE, STARTING_FRET,
+                    IFNULL(STRING_1, -1), IFNULL(STRING_2, -1), IFNULL(STRING_3, -1),
+                    IFNULL(STRING_4, -1), IFNULL(STRING_5, -1), IFNULL(STRING_6, -1)
+                )
+            ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS CHORD_ROOT ON TABLE_CHORDS (ROOT)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS CHORD_TYPE ON TABLE_CHORDS (TYPE)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS CHORD_STARTING_FRET ON TABLE_CHORDS (STARTING_FRET)')
+        return removed_rows
+
+    def _find_row_id(self, cursor, key):
+        root, chord_type, starting_fret, fingers = key
+        cursor.execute('''
+            SELECT ID FROM TABLE_CHORDS
+            WHERE ROOT = ? AND TYPE = ? AND STARTING_FRET = ?
+            AND STRING_1 IS ? AND STRING_2 IS ? AND STRING_3 IS ? AND STRING_4 IS ? AND STRING_5 IS ? AND STRING_6 IS ?
+        ''', (root, chord_type, starting_fret, *fingers))
+        row = cursor.fetchone()
+        return row[0] if row is not None else None
+
+    def _insert_row(self, cursor, chord, key):
+        # ID of the row holding the chord, inserted unless the identity index finds it already stored
+        cursor.execute('''
+            INSERT OR IGNORE INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending))
+        return cursor.lastrowid if cursor.rowcount else self._find_row_id(cursor, key)
 
-    def extend_barre_chords(self):
-        original_chords = self.chords.copy()
-        for chord in original_chords:
-            counter = 1
-            while True:
-                try:
-                    new_chord = GuitarChord(chord.root, chord.chord_type, chord.transposable_figures, finger_ascending=chord.finger_ascending.copy(), starting_fret=chord.starting_fret)
-                    new_chord.transpose(counter)
-                    if not self.chord_exists(new_chord):
-                        self.chords.append(new_chord)
-                    counter += 1
-                except ValueError:
-                    break
+    def save(self, db_name, incremental=False):
+        connection = sqlite3.connect(db_name)
+        cursor = connection.cursor()
 
-    def only(self, whitelist):
-        # Define the helper functions for each filter criterion
-        def filter_root(chord, values):
-            return chord.root in values
-
-        def filter_chord_type(chord, values):
-            return chord.chord_type in values
-
-        def filter_open(chord, values):
-            return chord.is_open() in values
-
-        def filter_starting_fret(chord, values):
-            return chord.starting_fret in values
-
-        def filter_include_string(chord, values):
-            # Check if all strings in values are included (i.e., not None in finger_ascending)
-            return all(chord.finger_ascending[string - 1] is not None for string in values)
-
-        def filter_inversion(chord, values):
-            notes = chord.get_notes(include_strings=False)
-
-            # Determine the inversion based on the position of the root note
-            if chord.root in notes:
-                root_position = notes.index(chord.root)
-                if root_position == 0:  # Root is the first note
-                    inversion = 1
-                elif root_position == 1:  # Root is the second note
-                    inversion = 2
-                else:  # Root is in any other position
-                    inversion = 3
+        # Incremental saves only make sense against the database the chords were loaded from.
+        # Without stored rows a full save does the same, as it skips the chords already stored
+        incremental = incremental and db_name == self._db_path and self._stored_chords is not None
+
+        with connection:
+            self._create_schema(cursor)
+            cursor.execute('SELECT 1 FROM TABLE_CHORDS LIMIT 1')
+            is_new_table = cursor.fetchone() is None
+            # Indexes are cheaper to build once after filling a new table
+            if not is_new_table and self._create_indexes(cursor):
+                # Removing duplicated rows invalidates the row IDs recorded at load time
+                incremental = False
+
+            if incremental:
+                # Rows of keys some chord still holds stay, even when another chord moved away from them
+                live_keys = {chord.get_key() for chord in self.chords}
+                moved_rows = set()
+                for chord in self.chords:
+                    key = chord.get_key()
+                    stored_chord = self._stored_chords.get(id(chord))
+                    if stored_chord is not None and stored_chord[0] is chord:
+                        _, row_id, stored_key = stored_chord
+                        if stored_key == key:
+                            continue
+                        if stored_key not in live_keys and row_id not in moved_rows:
+                            # The chord was changed in place, e.g. by transpose, its row moves with it
+                            moved_rows.add(row_id)
+                            cursor.execute('''
+                                UPDATE OR IGNORE TABLE_CHORDS
+                                SET ROOT = ?, TYPE = ?, STARTING_FRET = ?, STRING_1 = ?, STRING_2 = ?, STRING_3 = ?, STRING_4 = ?, STRING_5 = ?, STRING_6 = ?
+                                WHERE ID = ?
+                            ''', (chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending, row_id))
+                            if cursor.rowcount:
+                                self._stored_chords[id(chord)] = (chord, row_id, key)
+                                continue
+                            # Another row already holds the changed chord
+                            cursor.execute('DELETE FROM TABLE_CHORDS WHERE ID = ?', (row_id,))
+                    self._stored_chords[id(chord)] = (chord, self._insert_row(cursor, chord, key), key)
             else:
-                inversion = None
+                # Insert the chords once each, skipping those already stored
+                rows = {}
+                for chord in self.chords:
+                    rows.setdefault(chord.get_key(), (chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending))
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows.values())
+
+                # Remember the stored rows so the next incremental save can skip them
+                self._db_path = db_name
+                if self._stored_chords is not None:
+                    if is_new_table:
+                        row_ids = {key: row_id for row_id, key in enumerate(rows, start=1)}
+                    else:
+                        cursor.execute('SELECT ID, ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6 FROM TABLE_CHORDS')
+                        row_ids = {(root, chord_type, starting_fret, tuple(fingers)): row_id for row_id, root, chord_type, starting_fret, *fingers in cursor}
+                    self._stored_chords = {}
+                    for chord in self.chords:
+                        key = chord.get_key()
+                        self._stored_chords[id(chord)] = (chord, row_ids[key], key)
+
+            if is_new_table:
+                self._create_indexes(cursor)
 
-            return inversion in values
-
-        def filter_scale(chord, scales):
-            for tonic, scale in scales:
-                if chord.validate_against_scale(tonic, scale):
-                    return True
-            return False
+        connection.close()
 
-        # Map each whitelist key to its corresponding filter function
-        filter_functions = {
-            "root": filter_root,
-            "chord_type": filter_chord_type,
-            "open": filter_open,
-            "starting_fret": filter_starting_fret,
-            "include_string": filter_include_string,
-            "inversion": filter_inversion,
-            "scale": filter_scale  # New entry for scale
-        }
+    def _own(self, chord):
+        # Compact chords are immutable, they never go stale
+        if isinstance(chord, GuitarChord) and self._owner not in chord._owners:
+            # Owners of collections that no longer exist are dropped on the way
+            owners = tuple(owner for owner in chord._owners if owner.is_alive())
+            chord._owners = owners + self._owners if owners else self._owners
 
-        # Filter the chords
-        filtered_chords = []
+    def _index_chords(self):
         for chord in self.chords:
-            if all(filter_functions[key](chord, values) for key, values in whitelist.items()):
-                filtered_chords.append(chord)
-
-        return filtered_chords
-
-    def filter_out(self, blacklist):
-        # Get chords that match the blacklist criteria
-        matching_chords = self.only(blacklist)
+            self._own(chord)
+        self._chord_keys = None
+        self._indexed_version = self.get_version()
+        self._postings = {}
+        self._tonality_histogram = None
+        self._tonality_prefix_sums = {}
+
+    def _get_postings(self, criterion):
+        if criterion not in self._postings:
+            value_of = ChordCollection.indexed_criteria[criterion]
+            postings = {}
+            for chord_id, chord in enumerate(self.chords):
+                postings.setdefault(value_of(chord), set()).add(chord_id)
+            self._postings[criterion] = postings
+        return self._postings[criterion]
+
+    def _sync_index(self):
+        # Rebuild the index if self.chords or one of its chords was modified directly
+        if self._indexed_version != self.get_version():
+            self._index_chords()
+
+    def _get_chord_keys(self):
+        self._sync_index()
+        if self._chord_keys is None:
+            self._chord_keys = {chord.get_key() for chord in self.chords}
+        return self._chord_keys
 
-        # Subtract matching chords from the original list
-        remaining_chords = [chord for chord in self.chords if chord not in matching_chords]
+    def chord_exists(self, new_chord):
+        return new_chord.get_key() in self._get_chord_keys()
 
-        return remaining_chords
+    def add_chord(self, chord):
+        chord_keys = self._get_chord_keys()
+        key = chord.get_key()
+        if key in chord_keys:
+            return False
+        chord_id = len(self.chords)
+        self.chords.append(chord)
+        self._own(chord)
+        chord_keys.add(key)
+        self._indexed_version = self.get_version()
+        for criterion, postings in self._postings.items():
+            value = ChordCollection.indexed_criteria[criterion](chord)
+            postings.setdefault(value, set()).add(chord_id)
+        if self._tonality_histogram is not None and self._counts_for_tonality(chord):
+            fret_counts = self._tonality_histogram.setdefault(chord.root, {}).setdefault(chord.get_pitch_class_mask(), [0] * ChordCollection.tonality_frets)
+            fret_counts[chord.starting_fret - 1] += 1
+            self._tonality_prefix_sums = {}
+        return True
 
+    def extend_barre_chords(self):
+        original_chords = self.chords.copy()
+        for chord in original_chords:
+            for new_chord in chord.get_transpositions():
+                self.add_chord(new_chord)
+
+    def _lookup(self, criterion, values):
+        postings = self._get_postings(criterion)
+        if criterion == "include_string":
+            # Chords whose string-presence mask contains every requested string
+            required_mask = 0
+            for string in values:
+                required_mask |= 1 << (string - 1)
+            posting_sets = [chord_ids for string_mask, chord_ids in postings.items() if string_mask & required_mask == required_mask]
+        else:
+            posting_sets = [postings[value] for value in values if value in postings]
+        if len(posting_sets) == 1:
+            # Shared with the index, so callers must not modify it
+            return posting_sets[0]
+        return set().union(*posting_sets)
+
+    def _matching_ids(self, whitelist):
+        self._sync_index()
+
+        def filter_scale(chord, scale_masks):
+            chord_mask = chord.get_pitch_class_mask()
+            return any((chord_mask & ~scale_mask) == 0 for scale_mask in scale_masks)
+
+        # Criteria that are not indexed are checked chord by chord
+        filter_functions = {
+            "scale": filter_scale
+        }
 
-    def get_tonality(self, root, scale, amplitude=4, rank=1):
-        # Helper function to calculate harmonic sum
-        def harmonic_sum(n):
-            return sum(1 / i for i in range(1, n + 1))
-
-        # Modified helper function to find optimal fret segment
-        def find_optimal_fret_segment(guitar, amplitude, rank):
-            density_list = []
-            for start_fret in range(len(guitar) - amplitude + 1):
-                fret_segment = guitar[start_fret:start_fret + amplitude]
-                note_counts = {}
-                for fret in fret_segment:
-                    for note, count in fret.items():
-                        note_counts[note] = note_counts.get(note, 0) + count
-                density = 1
-                for count in note_counts.values():
-                    density *= harmonic_sum(count)
-                density_list.append((density, start_fret))
-
-            # Sort by density and select the segment of the desired rank
-            density_list.sort(key=lambda x: x[0], reverse=True)
-            if rank <= len(density_list):
-                return density_list[rank - 1][1]
+        candidate_sets = []
+        predicates = []
+        for key, values in whitelist.items():
+            if key in ChordCollection.indexed_criteria:
+                candidate_sets.append(self._lookup(key, values))
+            elif key == "scale":
+                # Scale masks are resolved once per query rather than once per chord
+                predicates.append((filter_functions[key], [GuitarChord.get_scale_mask(tonic, scale) for tonic, scale in values]))
             else:
-                return -1  # In case the rank is higher than the number of segments
+                predicates.append((filter_functions[key], values))
+
+        # Intersect the posting sets, most selective first
+        if candidate_sets:
+            candidate_sets.sort(key=len)
+            chord_ids = candidate_sets[0]
+            for candidate_set in candidate_sets[1:]:
+                if not chord_ids:
+                    break
+                chord_ids = chord_ids & candidate_set
+            chord_ids = sorted(chord_ids)
+        else:
+            chord_ids = range(len(self.chords))
 
-        # Helper function to group chords by starting fret and root, considering only barre chords
-        def group_chords_by_starting_fret_and_root(chord_list):
-            guitar = [{} for _ in range(12)]  # Assuming a 12-fret guitar
-            for chord in chord_list:
-                if not chord.is_open():
-                    fret = chord.starting_fret
-                    if fret > 0 and fret <= 12:
-                        guitar[fret - 1][chord.root] = guitar[fret - 1].get(chord.root, 0) + 1
-            return guitar
+        return [chord_id for chord_id in chord_ids if all(predicate(self.chords[chord_id], values) for predicate, values in predicates)]
 
-        # Filtering chords based on root and scale
-        filtered_chords = self.only({"root": [root], "scale": [(root, scale)]})
-        guitar = group_chords_by_starting_fret_and_root(filtered_chords)
+    def only(self, whitelist):
+        return [self.chords[chord_id] for chord_id in self._matching_ids(whitelist)]
 
-        # Finding the optimal fret segment based on the rank
-        optimal_start_fret = find_optimal_fret_segment(guitar, amplitude, rank)
+    def filter_out(self, blacklist):
+        # Get the positions of chords that match the blacklist criteria
+        matching_ids = set(self._matching_ids(blacklist))
+
+        # Keep every chord whose position is not among them
+        return [chord for chord_id, chord in enumerate(self.chords) if chord_id not in matching_ids]
+
+
+    @staticmethod
+    def _counts_for_tonality(chord):
+        # Only barre chords within the fretboard weigh in the density of a position
+        return not chord.is_open() and 0 < chord.starting_fret <= ChordCollection.tonality_frets
+
+    def _get_tonality_prefix_sums(self, root, scale):
+        self._sync_index()
+        if self._tonality_histogram is None:
+            self._tonality_histogram = {}
+            for chord in self.chords:
+                if self._counts_for_tonality(chord):
+                    fret_counts = self._tonality_histogram.setdefault(chord.root, {}).setdefault(chord.get_pitch_class_mask(), [0] * ChordCollection.tonality_frets)
+                    fret_counts[chord.starting_fret - 1] += 1
+
+        scale_mask = GuitarChord.get_scale_mask(root, scale)
+        key = (root, scale_mask)
+        if key not in self._tonality_prefix_sums:
+            # Chords of the root whose notes all fall in the scale, accumulated fret by fret
+            prefix_sums = [0] * (ChordCollection.tonality_frets + 1)
+            for pitch_class_mask, fret_counts in self._tonality_histogram.get(root, {}).items():
+                if pitch_class_mask & ~scale_mask == 0:
+                    for fret, count in enumerate(fret_counts):
+                        prefix_sums[fret + 1] += count
+            for fret in range(ChordCollection.tonality_frets):
+                prefix_sums[fret + 1] += prefix_sums[fret]
+            self._tonality_prefix_sums[key] = prefix_sums
+        return self._tonality_prefix_sums[key]
+
+    @staticmethod
+    def get_harmonic_number(n):
+        harmonic_numbers = ChordCollection.harmonic_numbers
+        while len(harmonic_numbers) <= n:
+            harmonic_numbers.append(harmonic_numbers[-1] + 1 / len(harmonic_numbers))
+        return harmonic_numbers[n]
+
+    def get_tonality_frets(self, root, scale, amplitude=4, rank=1):
+        # The `amplitude` consecutive frets holding the rank-th densest group of barre chords of the tonality
+        prefix_sums = self._get_tonality_prefix_sums(root, scale)
+
+        # The density of a window is H(chords in it), empty windows weigh 1
+        densities = []
+        for start_fret in range(ChordCollection.tonality_frets - amplitude + 1):
+            chord_count = prefix_sums[start_fret + amplitude] - prefix_sums[start_fret]
+            densities.append(self.get_harmonic_number(chord_count) if chord_count else 1)
+
+        # Ties go to the lowest fret
+        if rank > len(densities):
+            optimal_start_fret = -1  # In case the rank is higher than the number of segments
+        elif rank > 0:
+            optimal_start_fret = heapq.nsmallest(rank, range(len(densities)), key=lambda start_fret: (-densities[start_fret], start_fret))[-1]
+        else:
+            optimal_start_fret = sorted(range(len(densities)), key=lambda start_fret: -densities[start_fret])[rank - 1]
+
+        return list(range(optimal_start_fret + 1, optimal_start_fret + amplitude + 1))
+
+    def get_all_tonality_frets(self, roots=None, scale_names=None, amplitudes=(4,), rank=1):
+        # get_tonality_frets for every combination, {(root, scale name, amplitude): frets}
+        roots = GuitarChord.all_notes if roots is None else roots
+        scale_names = list(scales) if scale_names is None else scale_names
+        return {
+            (root, scale_name, amplitude): self.get_tonality_frets(root, scales[scale_name], amplitude, rank)
+            for root in roots
+            for scale_name in scale_names
+            for amplitude in amplitudes
+        }
 
+    def get_tonality(self, root, scale, amplitude=4, rank=1):
         # Determine the frets with the most density of chords
-        selected_frets = list(range(optimal_start_fret + 1, optimal_start_fret + amplitude + 1))
+        selected_frets = self.get_tonality_frets(root, scale, amplitude, rank)
 
         # Get chords of the tonality that are near each other and well distributed
         tonality_chords = self.only({"scale": [(root, scale)], "starting_fret": selected_frets, "open": [False]})
         return tonality_chords
-
-
-
@@ -0,0 +1,323 @@
+import sqlite3
+import numpy as np
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+# Value stored in the string columns for muted strings
+MUTED = -1
+
+
+class ChordRows:
+    # Lazy view over rows of a ColumnarChordCollection, GuitarChord objects are built on access
+    def __init__(self, collection, row_ids):
+        self._collection = collection
+        self.row_ids = row_ids
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def __iter__(self):
+        for row_id in self.row_ids:
+            yield self._collection.get_chord(row_id)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ChordRows(self._collection, self.row_ids[index])
+        return self._collection.get_chord(self.row_ids[index])
+
+
+class ColumnarChordCollection:
+    open_string_codes = np.array([GuitarChord.all_notes.index(note) for note in GuitarChord.open_string_notes], dtype=np.int16)
+    open_string_frequencies = np.array(GuitarChord.open_string_frequencies, dtype=np.float64)
+
+    def __init__(self, transposable_figures=transposable_figures):
+        self.transposable_figures = transposable_figures
+        self._clear()
+
+    def _clear(self):
+        self.chord_types = []
+        self._chord_type_codes = {}
+        # Transposable figures of each row, as codes into figure_lists; rows without their own use self.transposable_figures
+        self.figure_lists = [self.transposable_figures]
+        self._figure_list_codes = {id(self.transposable_figures): 0}
+        self.figure_list_codes = np.empty(0, dtype=np.int16)
+        self.strings = np.empty((0, 6), dtype=np.int8)
+        self.starting_frets = np.empty(0, dtype=np.int8)
+        self.root_codes = np.empty(0, dtype=np.int8)
+        self.chord_type_codes = np.empty(0, dtype=np.int16)
+        self.pitch_class_masks = np.empty(0, dtype=np.uint16)
+        self.inversions = np.empty(0, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.starting_frets)
+
+    def __iter__(self):
+        return iter(self.rows(np.arange(len(self))))
+
+    def rows(self, row_ids):
+        return ChordRows(self, row_ids)
+
+    def _get_chord_type_code(self, chord_type):
+        if chord_type not in self._chord_type_codes:
+            self._chord_type_codes[chord_type] = len(self.chord_types)
+            self.chord_types.append(chord_type)
+        return self._chord_type_codes[chord_type]
+
+    def _get_figure_list_code(self, figures):
+        # Lists are told apart by identity, like GuitarChord.get_figure_set
+        if id(figures) not in self._figure_list_codes:
+            self._figure_list_codes[id(figures)] = len(self.figure_lists)
+            self.figure_lists.append(figures)
+        return self._figure_list_codes[id(figures)]
+
+    def append_rows(self, roots, chord_types, starting_frets, fingers, figure_lists=None):
+        self._append_columns(*self._encode_rows(roots, chord_types, starting_frets, fingers, figure_lists))
+
+    def _encode_rows(self, roots, chord_types, starting_frets, fingers, figure_lists=None):
+        roots = list(roots)
+        strings = np.array([[MUTED if fret is None else fret for fret in row] for row in fingers], dtype=np.int8).reshape(-1, 6)
+        if figure_lists is None:
+            figure_list_codes = np.zeros(len(roots), dtype=np.int16)
+        else:
+            figure_list_codes = np.array([self._get_figure_list_code(figures) for figures in figure_lists], dtype=np.int16)
+        return (
+            strings,
+            np.array(starting_frets, dtype=np.int8),
+            np.array([GuitarChord.all_notes.index(root) for root in roots], dtype=np.int8),
+            np.array([self._get_chord_type_code(chord_type) for chord_type in chord_types], dtype=np.int16),
+            figure_list_codes,
+        )
+
+    def _append_columns(self, strings, starting_frets, root_codes, chord_type_codes, figure_list_codes):
+        pitch_class_masks, inversions = self._calculate_features(strings, starting_frets, root_codes)
+        self.strings = np.concatenate([self.strings, strings])
+        self.starting_frets = np.concatenate([self.starting_frets, starting_frets])
+        self.root_codes = np.concatenate([self.root_codes, root_codes])
+        self.chord_type_codes = np.concatenate([self.chord_type_codes, chord_type_codes])
+        self.figure_list_codes = np.concatenate([self.figure_list_codes, figure_list_codes])
+        self.pitch_class_masks = np.concatenate([self.pitch_class_masks, pitch_class_masks])
+        self.inversions = np.concatenate([self.inversions, inversions])
+
+    @classmethod
+    def from_collection(cls, collection, transposable_figures=transposable_figures):
+        # Every row keeps the transposable figures of the chord it comes from
+        columnar = cls(transposable_figures)
+        chords = collection.chords
+        columnar.append_rows([chord.root for chord in chords], [chord.chord_type for chord in chords], [chord.starting_fret for chord in chords], [chord.finger_ascending for chord in chords], [chord.transposable_figures for chord in chords])
+        return columnar
+
+    def load(self, db_path, batch_size=10000):
+        # Rows are read batch_size at a time and encoded into columns on the way
+        self._clear()
+        connection = sqlite3.connect(db_path)
+        columns = []
+        try:
+            cursor = connection.cursor()
+            cursor.execute('SELECT ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6 FROM TABLE_CHORDS')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                roots, chord_types, starting_frets, *strings = zip(*rows)
+                columns.append(self._encode_rows(roots, chord_types, starting_frets, zip(*strings)))
+        finally:
+            connection.close()
+
+        if columns:
+            self._append_columns(*(np.concatenate(column) for column in zip(*columns)))
+
+    def get_chord(self, row_id):
+        finger_ascending = [None if fret == MUTED else int(fret) for fret in self.strings[row_id]]
+        return GuitarChord(
+            GuitarChord.all_notes[self.root_codes[row_id]],
+            self.chord_types[self.chord_type_codes[row_id]],
+            self.figure_lists[self.figure_list_codes[row_id]],
+            finger_ascending=finger_ascending,
+            starting_fret=int(self.starting_frets[row_id]),
+        )
+
+    def _calculate_pitch_classes(self, strings, starting_frets):
+        # Pitch class sounding on each string, MUTED for muted strings
+        fretted = (self.open_string_codes + starting_frets[:, None].astype(np.int16) + strings - 1) % 12
+        pitch_classes = np.where(strings == 0, self.open_string_codes, fretted)
+        return np.where(strings == MUTED, MUTED, pitch_classes)
+
+    @staticmethod
+    def calculate_frequencies(strings, starting_frets):
+        # Frequency of each string in Hz, NaN where it is muted
+        fret_positions = np.where(strings > 0, starting_frets[:, None].astype(np.int16) + strings - 1, 0)
+        fret_ratios = np.array([GuitarChord.get_fret_ratio(fret) for fret in range(int(fret_positions.max(initial=0)) + 1)])
+        frequencies = ColumnarChordCollection.open_string_frequencies * fret_ratios[fret_positions]
+        return np.where(strings == MUTED, np.nan, frequencies)
+
+    def get_frequencies(self):
+        # (chords x 6) matrix of string frequencies, the batch counterpart of GuitarChord.calculate_frequencies
+        return self.calculate_frequencies(self.strings, self.starting_frets)
+
+    def _calculate_features(self, strings, starting_frets, root_codes):
+        pitch_classes = self._calculate_pitch_classes(strings, starting_frets)
+        played = pitch_classes != MUTED
+        bits = np.where(played, np.left_shift(1, np.maximum(pitch_classes, 0)), 0)
+        pitch_class_masks = np.bitwise_or.reduce(bits, axis=1).astype(np.uint16)
+
+        # Same ordering as GuitarChord.get_notes: each note takes the frequency of the
+        # highest numbered string that plays it
+        frequencies = self.calculate_frequencies(strings, starting_frets)
+        note_frequencies = np.full((len(strings), 12), np.nan)
+        row_ids = np.arange(len(strings))
+        for string_index in range(6):
+            rows = row_ids[played[:, string_index]]
+            note_frequencies[rows, pitch_classes[rows, string_index]] = frequencies[rows, string_index]
+
+        # Inversion codes: 1 root first, 2 root second, 3 otherwise, 0 root not played
+        root_frequencies = note_frequencies[row_ids, root_codes]
+        root_positions = (note_frequencies < root_frequencies[:, None]).sum(axis=1)
+        inversions = np.minimum(root_positions + 1, 3)
+        inversions = np.where(np.isnan(root_frequencies), 0, inversions).astype(np.int8)
+        return pitch_class_masks, inversions
+
+    def get_string_masks(self):
+        played = self.strings != MUTED
+        return (played * (1 << np.arange(6))).sum(axis=1)
+
+    def is_open(self):
+        return (self.strings == 0).any(axis=1)
+
+    def _matches(self, whitelist):
+        def filter_root(values):
+            return np.isin(self.root_codes, [GuitarChord.all_notes.index(value) for value in values if value in GuitarChord.all_notes])
+
+        def filter_chord_type(values):
+            return np.isin(self.chord_type_codes, [self._chord_type_codes[value] for value in values if value in self._chord_type_codes])
+
+        def filter_open(values):
+            return np.isin(self.is_open(), list(values))
+
+        def filter_starting_fret(values):
+            return np.isin(self.starting_frets, list(values))
+
+        def filter_include_string(values):
+            required_mask = 0
+            for string in values:
+                required_mask |= 1 << (string - 1)
+            return (self.get_string_masks() & required_mask) == required_mask
+
+        def filter_inversion(values):
+            return np.isin(self.inversions, [0 if value is None else value for value in values])
+
+        def filter_scale(scales):
+            matches = np.zeros(len(self), dtype=bool)
+            for tonic, scale in scales:
+                scale_mask = GuitarChord.get_scale_mask(tonic, scale)
+                matches |= (self.pitch_class_masks & ~np.uint16(scale_mask)) == 0
+            return matches
+
+        filter_functions = {
+            "root": filter_root,
+            "chord_type": filter_chord_type,
+            "open": filter_open,
+            "starting_fret": filter_starting_fret,
+            "include_string": filter_include_string,
+            "inversion": filter_inversion,
+            "scale": filter_scale
+        }
+
+        matches = np.ones(len(self), dtype=bool)
+        for key, values in whitelist.items():
+            matches &= filter_functions[key](values)
+        return matches
+
+    def only(self, whitelist):
+        return self.rows(np.flatnonzero(self._matches(whitelist)))
+
+    def filter_out(self, blacklist):
+        return self.rows(np.flatnonzero(~self._matches(blacklist)))
+
+    def _encode_keys(self, strings, starting_frets, root_codes, chord_type_codes):
+        # Packs (root, chord_type, starting_fret, finger_ascending) into one int64 per chord
+        keys = chord_type_codes.astype(np.int64)
+        keys = keys * 16 + root_codes
+        keys = keys * 32 + starting_frets
+        for string_index in range(6):
+            keys = keys * 32 + (strings[:, string_index].astype(np.int64) + 1)
+        return keys
+
+    def _encode_figures(self, figures):
+        codes = np.zeros(len(figures), dtype=np.int64)
+        for string_index in range(6):
+            codes = codes * 32 + figures[:, string_index] + 1
+        return codes
+
+    def extend_barre_chords(self):
+        # Vectorised equivalent of ChordCollection.extend_barre_chords
+        count = len(self)
+        # Rows of each figure list in use, with the encoded figures they may take
+        figure_groups = []
+        for figure_list_code in np.unique(self.figure_list_codes):
+            figures = np.array([[MUTED if fret is None else fret for fret in figure] for figure in self.figure_lists[figure_list_code]], dtype=np.int64).reshape(-1, 6)
+            figure_groups.append((self.figure_list_codes == figure_list_code, self._encode_figures(figures)))
+        strings = self.strings.astype(np.int64)
+        is_open = self.is_open()
+        played = strings != MUTED
+
+        alive = np.ones(count, dtype=bool)
+        new_columns = []
+        for distance in range(1, 13):
+            if not alive.any():
+                break
+            transposed_strings = np.where(is_open[:, None] & played, strings + 1, strings)
+            transposed_frets = np.where(is_open, np.maximum(0, self.starting_frets + distance - 1), self.starting_frets + distance)
+            figure_strings = np.where((transposed_frets != 0)[:, None] & played, transposed_strings + 1, transposed_strings)
+            encoded_figures = self._encode_figures(figure_strings)
+            known_figure = np.zeros(count, dtype=bool)
+            for rows, figure_codes in figure_groups:
+                known_figure[rows] = np.isin(encoded_figures[rows], figure_codes)
+            valid = (transposed_frets <= 9) & known_figure
+
+            # A chord stops sliding at its first invalid transposition
+            alive &= valid
+            row_ids = np.flatnonzero(alive)
+            new_columns.append((row_ids, np.full(len(row_ids), distance), transposed_strings[row_ids], transposed_frets[row_ids]))
+
+        if not new_columns:
+            return
+        row_ids, distances, new_strings, new_frets = (np.concatenate(column) for column in zip(*new_columns))
+
+        # Same insertion order as the chord-by-chord loop: by source chord, then by distance
+        order = np.lexsort((distances, row_ids))
+        row_ids, distances, new_strings, new_frets = row_ids[order], distances[order], new_strings[order], new_frets[order]
+        new_strings = new_strings.astype(np.int8)
+        new_frets = new_frets.astype(np.int8)
+        new_roots = ((self.root_codes[row_ids] + distances) % 12).astype(np.int8)
+        new_chord_types = self.chord_type_codes[row_ids]
+        new_figure_lists = self.figure_list_codes[row_ids]
+
+        # Keep only the first occurrence of each chord not already in the collection
+        keys = np.concatenate([
+            self._encode_keys(self.strings, self.starting_frets, self.root_codes, self.chord_type_codes),
+            self._encode_keys(new_strings, new_frets, new_roots, new_chord_types),
+        ])
+        _, first_ids = np.unique(keys, return_index=True)
+        first_ids = np.sort(first_ids[first_ids >= count]) - count
+        self._append_columns(new_strings[first_ids], new_frets[first_ids], new_roots[first_ids], new_chord_types[first_ids], new_figure_lists[first_ids])
+
+    def get_tonality(self, root, scale, amplitude=4, rank=1):
+        # Helper function to calculate harmonic sum, as in ChordCollection.get_tonality
+        def harmonic_sum(n):
+            return sum(1 / i for i in range(1, n + 1))
+
+        barre = self._matches({"root": [root], "scale": [(root, scale)], "open": [False]})
+        frets = self.starting_frets[barre]
+        frets = frets[(frets > 0) & (frets <= 12)]
+        fret_counts = np.bincount(frets - 1, minlength=12)[:12]
+
+        # Chords per window of `amplitude` frets, empty windows weigh 1
+        cumulative_counts = np.concatenate([[0], np.cumsum(fret_counts)])
+        window_counts = cumulative_counts[amplitude:] - cumulative_counts[:len(cumulative_counts) - amplitude]
+        densities = np.array([harmonic_sum(int(window_count)) if window_count else 1 for window_count in window_counts])
+
+        ranked_windows = np.argsort(-densities, kind="stable")
+        optimal_start_fret = int(ranked_windows[rank - 1]) if rank <= len(ranked_windows) else -1
+
+        selected_frets = list(range(optimal_start_fret + 1, optimal_start_fret + amplitude + 1))
+        return self.only({"scale": [(root, scale)], "starting_fret": selected_frets, "open": [False]})
@@ -0,0 +1,123 @@
+import sys
+from collections import OrderedDict
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+
+class CompactChord:
+    # Immutable, hashable chord whose strings and starting fret are packed into one int
+    __slots__ = ("root", "chord_type", "code")
+    # Each string takes 4 bits, 0 when muted and fret + 1 otherwise; the starting fret sits above them
+    string_bits = 4
+    fret_shift = 24
+    transposable_figures = transposable_figures
+    # GuitarChord per (root, code) answering everything that does not depend on the chord type,
+    # the least recently used dropped beyond max_shapes
+    shapes = OrderedDict()
+    max_shapes = 16384
+
+    def __init__(self, root, chord_type, *, starting_fret=0, finger_ascending):
+        if len(finger_ascending) != 6 or starting_fret < 0:
+            raise ValueError(f"Cannot pack fingers {finger_ascending} at starting fret {starting_fret}")
+        code = starting_fret << CompactChord.fret_shift
+        for string_index, fret in enumerate(finger_ascending):
+            if fret is None:
+                continue
+            if not 0 <= fret < (1 << CompactChord.string_bits) - 1:
+                raise ValueError(f"Cannot pack fingers {finger_ascending} at starting fret {starting_fret}")
+            code |= (fret + 1) << (string_index * CompactChord.string_bits)
+        self._set_fields(root, chord_type, code)
+
+    def _set_fields(self, root, chord_type, code):
+        # Roots and chord types repeat across the library, so every chord shares one string object for each
+        object.__setattr__(self, "root", sys.intern(root))
+        object.__setattr__(self, "chord_type", sys.intern(chord_type))
+        object.__setattr__(self, "code", code)
+
+    @staticmethod
+    def _from_code(root, chord_type, code):
+        chord = CompactChord.__new__(CompactChord)
+        chord._set_fields(root, chord_type, code)
+        return chord
+
+    @staticmethod
+    def from_chord(chord):
+        return CompactChord(chord.root, chord.chord_type, starting_fret=chord.starting_fret, finger_ascending=chord.finger_ascending)
+
+    def to_guitar_chord(self):
+        return GuitarChord(self.root, self.chord_type, self.transposable_figures, finger_ascending=self.finger_ascending, starting_fret=self.starting_fret)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompactChord is immutable, transpose() returns a new chord")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompactChord is immutable, transpose() returns a new chord")
+
+    def __reduce__(self):
+        return (CompactChord._from_code, (self.root, self.chord_type, self.code))
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactChord):
+            return NotImplemented
+        return self.code == other.code and self.root == other.root and self.chord_type == other.chord_type
+
+    def __hash__(self):
+        return hash((self.root, self.chord_type, self.code))
+
+    def __str__(self):
+        return f"({repr(self.root)}, {repr(self.chord_type)}, finger_ascending={self.finger_ascending}, starting_fret={self.starting_fret})"
+
+    @property
+    def starting_fret(self):
+        return self.code >> CompactChord.fret_shift
+
+    @property
+    def finger_ascending(self):
+        string_mask = (1 << CompactChord.string_bits) - 1
+        frets = [(self.code >> (string_index * CompactChord.string_bits)) & string_mask for string_index in range(6)]
+        return [fret - 1 if fret else None for fret in frets]
+
+    def get_key(self):
+        return (self.root, self.chord_type, self.starting_fret, tuple(self.finger_ascending))
+
+    def _get_shape(self):
+        shape_key = (self.root, self.code)
+        shape = CompactChord.shapes.get(shape_key)
+        if shape is None:
+            shape = GuitarChord(self.root, "", self.transposable_figures, finger_ascending=self.finger_ascending, starting_fret=self.starting_fret)
+            CompactChord.shapes[shape_key] = shape
+            if len(CompactChord.shapes) > CompactChord.max_shapes:
+                CompactChord.shapes.popitem(last=False)
+        else:
+            CompactChord.shapes.move_to_end(shape_key)
+        return shape
+
+    def calculate_frequencies(self):
+        return self._get_shape().calculate_frequencies()
+
+    def get_notes(self, include_strings=False):
+        return self._get_shape().get_notes(include_strings)
+
+    def get_pitch_class_mask(self):
+        return self._get_shape().get_pitch_class_mask()
+
+    def get_string_mask(self):
+        return self._get_shape().get_string_mask()
+
+    def get_inversion(self):
+        return self._get_shape().get_inversion()
+
+    def is_open(self):
+        return self._get_shape().is_open()
+
+    def validate_against_scale(self, tonic, scale):
+        return self._get_shape().validate_against_scale(tonic, scale)
+
+    def transpose(self, distance):
+        # Same rules and errors as GuitarChord.transpose, but the result is a new chord
+        chord = self.to_guitar_chord()
+        chord.transpose(distance)
+        return CompactChord.from_chord(chord)
+
+    def get_transpositions(self):
+        return [CompactChord(chord.root, self.chord_type, starting_fret=chord.starting_fret, finger_ascending=chord.finger_ascending) for chord in self._get_shape().get_transpositions()]
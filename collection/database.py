@@ -0,0 +1,69 @@
+import sqlite3
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+STRING_COLUMNS = ["STRING_1", "STRING_2", "STRING_3", "STRING_4", "STRING_5", "STRING_6"]
+
+
+class DatabaseChordCollection:
+    # Chords stay in the database, only() reads the rows that can match
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _where_clause(self, whitelist):
+        def in_clause(column, values):
+            values = list(values)
+            return f"{column} IN ({', '.join('?' for _ in values)})", values
+
+        def open_clause(values):
+            is_open = "(" + " OR ".join(f"{column} IS 0" for column in STRING_COLUMNS) + ")"
+            clauses = []
+            if True in values:
+                clauses.append(is_open)
+            if False in values:
+                clauses.append(f"NOT {is_open}")
+            return "(" + (" OR ".join(clauses) or "0") + ")", []
+
+        def include_string_clause(values):
+            return "(" + " AND ".join([f"{STRING_COLUMNS[string - 1]} IS NOT NULL" for string in values] or ["1"]) + ")", []
+
+        # Map each whitelist key that SQLite can evaluate to its clause builder
+        clause_functions = {
+            "root": lambda values: in_clause("ROOT", values),
+            "chord_type": lambda values: in_clause("TYPE", values),
+            "starting_fret": lambda values: in_clause("STARTING_FRET", values),
+            "open": open_clause,
+            "include_string": include_string_clause,
+        }
+
+        clauses = []
+        parameters = []
+        remaining = {}
+        for key, values in whitelist.items():
+            if key in clause_functions:
+                clause, clause_parameters = clause_functions[key](values)
+                clauses.append(clause)
+                parameters.extend(clause_parameters)
+            else:
+                remaining[key] = values
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, parameters, remaining
+
+    def only(self, whitelist):
+        where, parameters, remaining = self._where_clause(whitelist)
+
+        connection = sqlite3.connect(self.db_path)
+        cursor = connection.cursor()
+        cursor.execute(f'SELECT ROOT, TYPE, STARTING_FRET, {", ".join(STRING_COLUMNS)} FROM TABLE_CHORDS {where} ORDER BY ID', parameters)
+
+        candidates = ChordCollection()
+        for root, chord_type, starting_fret, *fingers in cursor:
+            candidates.chords.append(GuitarChord(root, chord_type, transposable_figures, finger_ascending=fingers, starting_fret=starting_fret))
+        connection.close()
+
+        # Scale and inversion depend on the notes, so they are checked on the surviving chords
+        if not remaining:
+            return candidates.chords
+        return candidates.only(remaining)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.resources.chord_types import chord_types
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+from guitar_chords.collection.voicings import VoicingGenerator
+
+
+class ChordIdentifier:
+    # Names fingerings through a reverse index {(pitch-class mask, bass note): [(root, chord type, complete)]}
+    def __init__(self, chord_type_intervals=None, max_names=65536):
+        # {chord type: list of interval sets}, by default the sets of resources/chord_types.py
+        if chord_type_intervals is None:
+            chord_type_intervals = {chord_type: [intervals] for chord_type, intervals in chord_types.items()}
+        self.chord_type_intervals = chord_type_intervals
+        self._index = {}
+        # Names of the fingerings identified last, the least recently used dropped beyond max_names
+        self.max_names = max_names
+        self._names = OrderedDict()
+        self._build_index()
+
+    @staticmethod
+    def from_collection(collection):
+        # Index the chord types of the collection with their interval sets from resources/chord_types.py.
+        # Stored chords may be mislabelled, so only types missing from chord_types take the interval sets
+        # their chords actually play
+        chord_type_intervals = {}
+        for chord in collection.chords:
+            if chord.chord_type in chord_types:
+                chord_type_intervals.setdefault(chord.chord_type, [chord_types[chord.chord_type]])
+                continue
+            interval_sets = chord_type_intervals.setdefault(chord.chord_type, [])
+            root_code = GuitarChord.all_notes.index(chord.root)
+            intervals = sorted({(GuitarChord.all_notes.index(note) - root_code) % 12 for note in chord.get_notes()})
+            if intervals not in interval_sets:
+                interval_sets.append(intervals)
+        return ChordIdentifier(chord_type_intervals)
+
+    def _build_index(self):
+        for chord_type, interval_sets in self.chord_type_intervals.items():
+            for intervals in interval_sets:
+                allowed_mask, required_mask = VoicingGenerator.get_interval_masks(intervals)
+                # Same notes a generated voicing may play: every chord tone, or all but the optional ones
+                masks = [allowed_mask] if allowed_mask == required_mask else [allowed_mask, required_mask]
+                for root_code, root in enumerate(GuitarChord.all_notes):
+                    for mask in masks:
+                        rotated_mask = ((mask << root_code) | (mask >> (12 - root_code))) & 0xFFF
+                        for bass_code in range(12):
+                            if rotated_mask & (1 << bass_code):
+                                # A name is complete if any of its interval sets is played in full
+                                candidates = self._index.setdefault((rotated_mask, GuitarChord.all_notes[bass_code]), {})
+                                candidates[(root, chord_type)] = candidates.get((root, chord_type), False) or mask == allowed_mask
+
+        # Complete chords in root position first
+        for key, candidates in self._index.items():
+            ranked = [(root, chord_type, complete) for (root, chord_type), complete in candidates.items()]
+            ranked.sort(key=lambda candidate: (not candidate[2], candidate[0] != key[1]))
+            self._index[key] = ranked
+
+    @staticmethod
+    def parse_tab(tab):
+        # "x32010" or "x 3 2 0 1 0", 6th string first, into finger_ascending frets from the 1st string
+        frets = tab.split() if " " in tab.strip() else list(tab)
+        if len(frets) != 6:
+            raise ValueError(f"A tab needs one fret per string: {tab!r}")
+        return [None if fret.lower() == "x" else int(fret) for fret in reversed(frets)]
+
+    def lookup(self, pitch_class_mask, bass):
+        return self._index.get((pitch_class_mask, bass), [])
+
+    def identify(self, finger_ascending, starting_fret=1):
+        # Candidate (root, chord type, inversion) names of a fingering, most plausible first;
+        # with the default starting fret the fingers are absolute frets
+        key = (tuple(finger_ascending), starting_fret)
+        names = self._names.get(key)
+        if names is not None:
+            self._names.move_to_end(key)
+        else:
+            chord = GuitarChord(GuitarChord.all_notes[0], "", transposable_figures, finger_ascending=list(finger_ascending), starting_fret=starting_fret)
+            notes = chord.get_notes()
+            if not notes:
+                names = []
+            else:
+                names = [(root, chord_type, GuitarChord.calculate_inversion(notes, root)) for root, chord_type, _ in self.lookup(chord.get_pitch_class_mask(), notes[0])]
+            self._names[key] = names
+            if len(self._names) > self.max_names:
+                self._names.popitem(last=False)
+        return list(names)
+
+    def identify_tab(self, tab):
+        return self.identify(self.parse_tab(tab))
+
+    def identify_many(self, fingerings):
+        # Tabs or finger_ascending lists of absolute frets; repeated fingerings are named once
+        return [self.identify_tab(fingering) if isinstance(fingering, str) else self.identify(fingering) for fingering in fingerings]
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+import numpy as np
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.resources.chord_types import chord_types
+
+roman_numerals = ["i", "ii", "iii", "iv", "v", "vi", "vii"]
+# Number of set bits of every 12-bit pitch-class mask
+pitch_class_counts = np.array([bin(mask).count("1") for mask in range(1 << 12)], dtype=np.int64)
+
+
+class VoiceLeadingCost:
+    # Hand movement between two voicings: fret distance of the hand, minus the notes they share,
+    # plus the strings that start or stop sounding
+    def __init__(self, fret_weight=1.0, common_tone_weight=0.5, string_weight=0.25):
+        self.fret_weight = fret_weight
+        self.common_tone_weight = common_tone_weight
+        self.string_weight = string_weight
+
+    @staticmethod
+    def get_hand_position(chord):
+        # Mean absolute fret of the fretted strings, 0 when only open strings ring
+        frets = [chord.starting_fret + fret - 1 for fret in chord.finger_ascending if fret]
+        return sum(frets) / len(frets) if frets else 0
+
+    def get_features(self, chords):
+        positions = np.array([self.get_hand_position(chord) for chord in chords], dtype=np.float64)
+        pitch_class_masks = np.array([chord.get_pitch_class_mask() for chord in chords], dtype=np.int64)
+        string_masks = np.array([chord.get_string_mask() for chord in chords], dtype=np.int64)
+        return positions, pitch_class_masks, string_masks
+
+    def get_cost_matrix(self, chords_a, chords_b):
+        positions_a, pitch_classes_a, strings_a = self.get_features(chords_a)
+        positions_b, pitch_classes_b, strings_b = self.get_features(chords_b)
+        fret_distances = np.abs(positions_a[:, None] - positions_b[None, :])
+        common_tones = pitch_class_counts[pitch_classes_a[:, None] & pitch_classes_b[None, :]]
+        string_changes = pitch_class_counts[strings_a[:, None] ^ strings_b[None, :]]
+        return self.fret_weight * fret_distances - self.common_tone_weight * common_tones + self.string_weight * string_changes
+
+    def __call__(self, chord_a, chord_b):
+        return float(self.get_cost_matrix([chord_a], [chord_b])[0, 0])
+
+
+class ProgressionOptimizer:
+    # Picks one voicing per step of a progression minimising the summed transition cost,
+    # by dynamic programming over the candidate voicings of consecutive steps
+    def __init__(self, collection, cost=None, max_cost_matrices=1024):
+        self.collection = collection
+        # Either an object with get_cost_matrix(chords_a, chords_b) or a function cost(chord_a, chord_b)
+        self.cost = VoiceLeadingCost() if cost is None else cost
+        # Candidates per whitelist, valid for one version of the collection
+        self._candidates = {}
+        self._candidates_version = None
+        # Cost matrices keyed by the chord keys of both candidate lists, the least recently used dropped beyond max_cost_matrices
+        self.max_cost_matrices = max_cost_matrices
+        self._cost_matrices = OrderedDict()
+
+    @staticmethod
+    def get_diatonic_steps(tonic, scale, degrees, sevenths=False):
+        # Steps (root, chord type) of the chords built in thirds on scale degrees, e.g. "I-vi-IV-V" or [1, 6, 4, 5]
+        if isinstance(degrees, str):
+            degrees = [roman_numerals.index(degree.strip().lower()) + 1 for degree in degrees.split("-")]
+        tonic_code = GuitarChord.all_notes.index(tonic)
+
+        steps = []
+        for degree in degrees:
+            chord_degrees = [degree - 1 + third * 2 for third in range(4 if sevenths else 3)]
+            intervals = [(scale[chord_degree % len(scale)] - scale[degree - 1]) % 12 for chord_degree in chord_degrees]
+            chord_type = next((name for name, type_intervals in chord_types.items() if type_intervals == intervals), None)
+            if chord_type is None:
+                raise ValueError(f"No chord type with intervals {intervals} for degree {degree}")
+            steps.append((GuitarChord.all_notes[(tonic_code + scale[degree - 1]) % 12], chord_type))
+        return steps
+
+    @staticmethod
+    def get_chord_keys(chords):
+        return tuple(chord.get_key() for chord in chords)
+
+    def _get_step(self, step):
+        # Candidates of a step with their chord keys, which identify them in the cost matrix cache
+        if isinstance(step, list):
+            return step, self.get_chord_keys(step)
+        whitelist = {"root": [step[0]], "chord_type": [step[1]]} if isinstance(step, tuple) else step
+        version = self.collection.get_version()
+        if version != self._candidates_version:
+            self._candidates = {}
+            self._candidates_version = version
+        key = repr(whitelist)
+        if key not in self._candidates:
+            candidates = self.collection.only(whitelist)
+            if not candidates:
+                raise ValueError(f"No chords in the collection match {whitelist}")
+            self._candidates[key] = (candidates, self.get_chord_keys(candidates))
+        return self._candidates[key]
+
+    def get_candidates(self, step):
+        # Chords of the collection for a step: (root, chord type), an only() whitelist or a list of chords
+        return self._get_step(step)[0]
+
+    def get_cost_matrix(self, chords_a, chords_b):
+        return self._get_cost_matrix(chords_a, self.get_chord_keys(chords_a), chords_b, self.get_chord_keys(chords_b))
+
+    def _get_cost_matrix(self, chords_a, keys_a, chords_b, keys_b):
+        # Cached per pair of candidate lists, which progressions over the same chords share
+        key = (keys_a, keys_b)
+        cost_matrix = self._cost_matrices.get(key)
+        if cost_matrix is not None:
+            self._cost_matrices.move_to_end(key)
+            return cost_matrix
+
+        if hasattr(self.cost, "get_cost_matrix"):
+            cost_matrix = np.asarray(self.cost.get_cost_matrix(chords_a, chords_b), dtype=np.float64)
+        else:
+            cost_matrix = np.array([[self.cost(chord_a, chord_b) for chord_b in chords_b] for chord_a in chords_a], dtype=np.float64).reshape(len(chords_a), len(chords_b))
+        self._cost_matrices[key] = cost_matrix
+        if len(self._cost_matrices) > self.max_cost_matrices:
+            self._cost_matrices.popitem(last=False)
+        return cost_matrix
+
+    def optimize(self, steps):
+        # Returns (voicings, total cost); O(steps x k^2) for k candidates per step
+        step_candidates = [self._get_step(step) for step in steps]
+        if not step_candidates:
+            return [], 0.0
+        candidate_lists = [candidates for candidates, _ in step_candidates]
+
+        total_costs = np.zeros(len(candidate_lists[0]))
+        back_pointers = []
+        for (previous, previous_keys), (current, current_keys) in zip(step_candidates, step_candidates[1:]):
+            path_costs = total_costs[:, None] + self._get_cost_matrix(previous, previous_keys, current, current_keys)
+            best_previous = np.argmin(path_costs, axis=0)
+            back_pointers.append(best_previous)
+            total_costs = path_costs[best_previous, np.arange(len(current))]
+
+        # Follow the back pointers from the cheapest last voicing
+        chord_id = int(np.argmin(total_costs))
+        total_cost = float(total_costs[chord_id])
+        voicings = [candidate_lists[-1][chord_id]]
+        for step_id in range(len(back_pointers) - 1, -1, -1):
+            chord_id = int(back_pointers[step_id][chord_id])
+            voicings.append(candidate_lists[step_id][chord_id])
+        voicings.reverse()
+        return voicings, total_cost
+
+    def optimize_many(self, progressions):
+        return [self.optimize(steps) for steps in progressions]
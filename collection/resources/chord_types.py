@@ -0,0 +1,50 @@
+chord_types = {
+    "": [0, 4, 7],
+    "11": [0, 4, 5, 7, 10],
+    "13": [0, 4, 7, 9, 10],
+    "5": [0, 7],
+    "6": [0, 4, 7, 9],
+    "6add9": [0, 2, 4, 7, 9],
+    "6b5": [0, 4, 6, 9],
+    "7": [0, 4, 7, 10],
+    "7#9": [0, 3, 4, 7, 10],
+    "7sus2": [0, 2, 7, 10],
+    "7sus2#5": [0, 2, 8, 10],
+    "7sus2sus4": [0, 2, 5, 7, 10],
+    "7sus4": [0, 5, 7, 10],
+    "7sus4#5": [0, 5, 8, 10],
+    "9": [0, 2, 4, 7, 10],
+    "9sus4": [0, 2, 5, 7, 10],
+    "add9": [0, 2, 4, 7],
+    "aug7": [0, 4, 8, 10],
+    "augmaj7": [0, 4, 8, 11],
+    "augmaj9": [0, 2, 4, 8, 11],
+    "dim": [0, 3, 6],
+    "m": [0, 3, 7],
+    "m#5": [0, 3, 8],
+    "m11": [0, 3, 5, 7, 10],
+    "m13": [0, 3, 7, 9, 10],
+    "m6": [0, 3, 7, 9],
+    "m7": [0, 3, 7, 10],
+    "m7#5": [0, 3, 8, 10],
+    "m7b5": [0, 3, 6, 10],
+    "m9": [0, 2, 3, 7, 10],
+    "maj#11": [0, 4, 6, 7, 11],
+    "maj13": [0, 4, 7, 9, 11],
+    "maj7": [0, 4, 7, 11],
+    "maj7b5": [0, 4, 6, 11],
+    "maj7sus2": [0, 2, 7, 11],
+    "maj7sus4": [0, 5, 7, 11],
+    "maj7sus4#5": [0, 5, 8, 11],
+    "maj9": [0, 2, 4, 7, 11],
+    "majb5": [0, 4, 6],
+    "mbb5": [0, 3, 5],
+    "mmaj13": [0, 3, 7, 9, 11],
+    "mmaj7": [0, 3, 7, 11],
+    "sus2": [0, 2, 7],
+    "sus2#5": [0, 2, 8],
+    "sus2b5": [0, 2, 6],
+    "sus2sus4": [0, 2, 5, 7],
+    "sus4": [0, 5, 7],
+    "sus4#5": [0, 5, 8]
+}
@@ -0,0 +1,158 @@
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.resources.chord_types import chord_types
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+# Interval that chords of four or more notes may leave out
+PERFECT_FIFTH = 7
+
+
+class VoicingGenerator:
+    # Searches the fretboard for every playable shape of a chord, in the form the database uses:
+    # fretted shapes start at their lowest fret with a 1, open position shapes have starting fret 1
+    # and 0 on the open strings
+    open_string_codes = [GuitarChord.all_notes.index(note) for note in GuitarChord.open_string_notes]
+
+    def __init__(self, max_span=3, max_fingers=4, min_strings=3, max_starting_fret=9, allow_open=True, allow_inner_mutes=False, transposable_figures=transposable_figures):
+        self.max_span = max_span
+        self.max_fingers = max_fingers
+        self.min_strings = min_strings
+        self.max_starting_fret = max_starting_fret
+        self.allow_open = allow_open
+        self.allow_inner_mutes = allow_inner_mutes
+        self.transposable_figures = transposable_figures
+        # Fretted shapes only depend on the intervals and the fret of the window relative to the root,
+        # {(intervals, offset): shapes}; open position shapes are kept per root, {(intervals, root): shapes}
+        self._shapes = {}
+        self._open_shapes = {}
+
+    @staticmethod
+    def get_interval_masks(intervals):
+        # Bitmasks of the intervals a shape may play and of those it must play
+        allowed_mask = 0
+        for interval in intervals:
+            allowed_mask |= 1 << (interval % 12)
+        required_mask = allowed_mask
+        if len(intervals) >= 4 and PERFECT_FIFTH in intervals:
+            required_mask &= ~(1 << PERFECT_FIFTH)
+        return allowed_mask, required_mask
+
+    def count_fingers(self, fingers):
+        fretted = [(string_index, fret) for string_index, fret in enumerate(fingers) if fret]
+        if not fretted:
+            return 0
+        lowest_fret = min(fret for _, fret in fretted)
+        barred = [string_index for string_index, fret in fretted if fret == lowest_fret]
+
+        # One finger bars the lowest fret unless an open string lies under the barre
+        if len(barred) > 1 and all(fingers[string_index] != 0 for string_index in range(barred[0], barred[-1] + 1)):
+            return len(fretted) - len(barred) + 1
+        return len(fretted)
+
+    def _search(self, string_options, required_mask, is_valid):
+        # Depth-first over the strings, pruning branches that can no longer cover the required intervals
+        reachable_masks = [0] * 7
+        for string_index in range(5, -1, -1):
+            reachable_masks[string_index] = reachable_masks[string_index + 1]
+            for _, interval_bit in string_options[string_index]:
+                reachable_masks[string_index] |= interval_bit
+
+        shapes = []
+        fingers = [None] * 6
+
+        def visit(string_index, covered_mask, sounding, muted_after_sounding):
+            if (covered_mask | reachable_masks[string_index]) & required_mask != required_mask:
+                return
+            if sounding + 6 - string_index < self.min_strings:
+                return
+            if string_index == 6:
+                if self.count_fingers(fingers) <= self.max_fingers and is_valid(fingers):
+                    shapes.append(tuple(fingers))
+                return
+
+            # Muted string
+            fingers[string_index] = None
+            visit(string_index + 1, covered_mask, sounding, muted_after_sounding or sounding > 0)
+
+            # Strings between two sounding strings may only be muted when allow_inner_mutes is set
+            if muted_after_sounding and not self.allow_inner_mutes:
+                return
+            for fret, interval_bit in string_options[string_index]:
+                fingers[string_index] = fret
+                visit(string_index + 1, covered_mask | interval_bit, sounding + 1, muted_after_sounding)
+            fingers[string_index] = None
+
+        visit(0, 0, 0, False)
+        return shapes
+
+    def get_shapes(self, intervals, offset):
+        # Fretted shapes whose lowest fret sits `offset` semitones above the root
+        key = (tuple(intervals), offset % 12)
+        if key not in self._shapes:
+            allowed_mask, required_mask = self.get_interval_masks(intervals)
+            string_options = []
+            for open_string_code in self.open_string_codes:
+                options = []
+                for fret in range(1, self.max_span + 2):
+                    interval_bit = 1 << ((open_string_code + offset + fret - 1) % 12)
+                    if interval_bit & allowed_mask:
+                        options.append((fret, interval_bit))
+                string_options.append(options)
+            self._shapes[key] = self._search(string_options, required_mask, lambda fingers: 1 in fingers)
+        return self._shapes[key]
+
+    def get_open_shapes(self, intervals, root):
+        # Shapes in the first position that ring at least one open string
+        key = (tuple(intervals), root)
+        if key not in self._open_shapes:
+            allowed_mask, required_mask = self.get_interval_masks(intervals)
+            root_code = GuitarChord.all_notes.index(root)
+            string_options = []
+            for open_string_code in self.open_string_codes:
+                options = []
+                for fret in range(0, self.max_span + 2):
+                    interval_bit = 1 << ((open_string_code + fret - root_code) % 12)
+                    if interval_bit & allowed_mask:
+                        options.append((fret, interval_bit))
+                string_options.append(options)
+            self._open_shapes[key] = self._search(string_options, required_mask, lambda fingers: 0 in fingers)
+        return self._open_shapes[key]
+
+    def generate(self, root, chord_type, intervals=None):
+        intervals = chord_types[chord_type] if intervals is None else intervals
+        root_code = GuitarChord.all_notes.index(root)
+
+        chords = []
+        if self.allow_open:
+            for shape in self.get_open_shapes(intervals, root):
+                chords.append(GuitarChord(root, chord_type, self.transposable_figures, finger_ascending=list(shape), starting_fret=1))
+        for starting_fret in range(1, self.max_starting_fret + 1):
+            for shape in self.get_shapes(intervals, starting_fret - root_code):
+                chords.append(GuitarChord(root, chord_type, self.transposable_figures, finger_ascending=list(shape), starting_fret=starting_fret))
+        return chords
+
+    def generate_all(self, roots=None, chord_type_names=None):
+        roots = GuitarChord.all_notes if roots is None else roots
+        chord_type_names = list(chord_types) if chord_type_names is None else chord_type_names
+        for root in roots:
+            for chord_type in chord_type_names:
+                yield from self.generate(root, chord_type)
+
+    @staticmethod
+    def get_transposable_figure(chord):
+        # Figure GuitarChord.transpose checks when moving the chord up the neck
+        shift = 2 if chord.is_open() else 1
+        return [fret + shift if fret is not None else None for fret in chord.finger_ascending]
+
+    def extend_collection(self, collection, roots=None, chord_type_names=None, register_figures=False):
+        # Adds the generated chords that the collection lacks, optionally making them transposable
+        added = 0
+        figure_set = set(GuitarChord.get_figure_set(self.transposable_figures))
+        for chord in self.generate_all(roots, chord_type_names):
+            if collection.add_chord(chord):
+                added += 1
+            if register_figures:
+                figure = self.get_transposable_figure(chord)
+                if tuple(figure) not in figure_set:
+                    figure_set.add(tuple(figure))
+                    self.transposable_figures.append(figure)
+        return added
@@ -0,0 +1,363 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from guitar_chords.builder.builders import ShortBuilder, LongBuilder
+from guitar_chords.builder.cache import DiagramCache
+from guitar_chords.builder.director import Director
+from guitar_chords.builder.svg_builders import SvgShortBuilder, SvgLongBuilder
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.identification import ChordIdentifier
+from guitar_chords.collection.resources.scales import scales
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+default_db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+# Builder for each (style, format) of /render
+builder_classes = {
+    ("short", "png"): ShortBuilder,
+    ("long", "png"): LongBuilder,
+    ("short", "svg"): SvgShortBuilder,
+    ("long", "svg"): SvgLongBuilder,
+}
+
+# Directors owned by each render process, one per builder
+_worker_directors = {}
+
+
+def _render_sheet(builder_key, chord_fields, columns):
+    if builder_key not in _worker_directors:
+        _worker_directors[builder_key] = Director(builder_classes[builder_key](), cache=DiagramCache())
+    director = _worker_directors[builder_key]
+
+    chords = [GuitarChord(root, chord_type, transposable_figures, finger_ascending=list(finger_ascending), starting_fret=starting_fret) for root, chord_type, starting_fret, finger_ascending in chord_fields]
+    director.build_multiple_chords(chords, columns=columns)
+    image = director.get_image()
+    if builder_key[1] == "svg":
+        return "image/svg+xml", image.tostring().encode()
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return "image/png", buffer.getvalue()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceMetrics:
+    # Request counts and the latencies of the last `window` requests of each endpoint
+    def __init__(self, window=10000):
+        self.window = window
+        self.started = time.perf_counter()
+        self.latencies = {}
+        self.counts = {}
+        self.errors = {}
+        self.coalesced = 0
+        self.in_flight = 0
+
+    def record(self, endpoint, latency, failed=False):
+        self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(latency)
+        self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+        if failed:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    @staticmethod
+    def get_percentile(sorted_values, fraction):
+        return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+    def get_stats(self):
+        uptime = time.perf_counter() - self.started
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            sorted_latencies = sorted(latencies)
+            endpoints[endpoint] = {
+                "requests": self.counts[endpoint],
+                "errors": self.errors.get(endpoint, 0),
+                "p50_ms": 1000 * self.get_percentile(sorted_latencies, 0.5),
+                "p90_ms": 1000 * self.get_percentile(sorted_latencies, 0.9),
+                "p99_ms": 1000 * self.get_percentile(sorted_latencies, 0.99),
+                "max_ms": 1000 * sorted_latencies[-1],
+            }
+        total_requests = sum(self.counts.values())
+        return {
+            "uptime_s": uptime,
+            "requests": total_requests,
+            "requests_per_second": total_requests / uptime if uptime else 0,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+            "endpoints": endpoints,
+        }
+
+
+class ChordService:
+    # Keeps one loaded and indexed collection in memory and answers HTTP queries about it.
+    # Identical requests that arrive while one is being answered share its response
+    def __init__(self, db_path=default_db_path, render_workers=None, max_limit=1000):
+        # Most chords a single /chords or /render request returns
+        self.max_limit = max_limit
+        self.collection = ChordCollection()
+        self.collection.load(db_path)
+        # Build every secondary index now rather than on the first request
+        for criterion in ChordCollection.indexed_criteria:
+            self.collection.only({criterion: []})
+        self.identifier = ChordIdentifier.from_collection(self.collection)
+
+        # Queries share one thread, so the collection's lazily built caches are never filled concurrently
+        self._query_executor = ThreadPoolExecutor(max_workers=1)
+        self._render_executor = ProcessPoolExecutor(max_workers=render_workers)
+        self._pending = {}
+        self.metrics = ServiceMetrics()
+        self.routes = {
+            "/chords": self.get_chords,
+            "/tonality": self.get_tonality,
+            "/positions": self.get_positions,
+            "/identify": self.identify,
+            "/render": self.render,
+            "/metrics": self.get_metrics,
+        }
+
+    def close(self):
+        self._query_executor.shutdown()
+        self._render_executor.shutdown()
+
+    @staticmethod
+    def _get_values(query, name):
+        # Repeated parameters and comma separated values, ?root=C&root=G or ?root=C,G
+        return [value for raw_value in query.get(name, []) for value in raw_value.split(",")]
+
+    @staticmethod
+    def _get_value(query, name, default=None, convert=str):
+        values = query.get(name)
+        if not values:
+            if default is None:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing parameter {name}")
+            return default
+        try:
+            return convert(values[0])
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid {name}: {values[0]!r}")
+
+    @staticmethod
+    def _get_count(query, name, default, maximum=None):
+        # Positive integer parameter, capped at maximum
+        value = ChordService._get_value(query, name, default, int)
+        if value < 1:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid {name}: {value}, expected at least 1")
+        return min(value, maximum) if maximum is not None else value
+
+    @staticmethod
+    def _get_scale(scale_name):
+        if scale_name not in scales:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown scale {scale_name!r}, expected one of {', '.join(scales)}")
+        return scales[scale_name]
+
+    def _get_whitelist(self, query):
+        # Map query parameters to only() criteria
+        converters = {
+            "root": str,
+            "chord_type": str,
+            "starting_fret": int,
+            "open": lambda value: value.lower() in ("1", "true", "yes"),
+            "include_string": int,
+            "inversion": lambda value: None if value.lower() == "none" else int(value),
+        }
+        whitelist = {}
+        for name, convert in converters.items():
+            if name in query:
+                try:
+                    whitelist[name] = [convert(value) for value in self._get_values(query, name)]
+                except ValueError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid {name}: {query[name]!r}")
+        if "scale" in query:
+            # ?scale=C:ionian
+            whitelist["scale"] = []
+            for value in self._get_values(query, "scale"):
+                tonic, _, scale_name = value.partition(":")
+                whitelist["scale"].append((tonic, self._get_scale(scale_name)))
+        return whitelist
+
+    @staticmethod
+    def _chord_fields(chord):
+        return {"root": chord.root, "chord_type": chord.chord_type, "starting_fret": chord.starting_fret, "finger_ascending": list(chord.finger_ascending)}
+
+    @staticmethod
+    def _json(payload):
+        return "application/json", json.dumps(payload).encode()
+
+    async def _run_query(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._query_executor, function, *args)
+
+    async def get_chords(self, query):
+        whitelist = self._get_whitelist(query)
+        limit = self._get_count(query, "limit", self.max_limit, self.max_limit)
+        chords = await self._run_query(self.collection.only, whitelist)
+        return self._json([self._chord_fields(chord) for chord in chords[:limit]])
+
+    async def get_tonality(self, query):
+        root = self._get_value(query, "root")
+        scale = self._get_scale(self._get_value(query, "scale", "ionian"))
+        amplitude = self._get_value(query, "amplitude", 4, int)
+        rank = self._get_value(query, "rank", 1, int)
+
+        def find_tonality():
+            return self.collection.get_tonality_frets(root, scale, amplitude, rank), self.collection.get_tonality(root, scale, amplitude, rank)
+
+        frets, chords = await self._run_query(find_tonality)
+        return self._json({"frets": frets, "chords": [self._chord_fields(chord) for chord in chords]})
+
+    async def get_positions(self, query):
+        # Suggested frets for every tonic and mode, or the requested ones
+        roots = self._get_values(query, "root") or None
+        scale_names = self._get_values(query, "scale") or None
+        for scale_name in scale_names or []:
+            self._get_scale(scale_name)
+        try:
+            amplitudes = [int(value) for value in self._get_values(query, "amplitude")] or [4]
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid amplitude: {query['amplitude']!r}")
+        rank = self._get_value(query, "rank", 1, int)
+
+        positions = await self._run_query(self.collection.get_all_tonality_frets, roots, scale_names, amplitudes, rank)
+        return self._json([{"root": root, "scale": scale_name, "amplitude": amplitude, "frets": frets} for (root, scale_name, amplitude), frets in positions.items()])
+
+    async def identify(self, query):
+        # ?tab=x32010&tab=022100, one list of (root, chord type, inversion) per tab
+        tabs = query.get("tab")
+        if not tabs:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing parameter tab")
+        names = await self._run_query(self.identifier.identify_many, tabs)
+        return self._json({tab: [{"root": root, "chord_type": chord_type, "inversion": inversion} for root, chord_type, inversion in tab_names] for tab, tab_names in zip(tabs, names)})
+
+    async def render(self, query):
+        # Chord sheet of the chords matching the same criteria as /chords
+        whitelist = self._get_whitelist(query)
+        limit = self._get_count(query, "limit", min(64, self.max_limit), self.max_limit)
+        columns = self._get_count(query, "columns", 4)
+        builder_key = (self._get_value(query, "style", "short"), self._get_value(query, "format", "png"))
+        if builder_key not in builder_classes:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unsupported style and format {builder_key}")
+
+        chords = (await self._run_query(self.collection.only, whitelist))[:limit]
+        if not chords:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "No chords match the query")
+        chord_fields = [(chord.root, chord.chord_type, chord.starting_fret, list(chord.finger_ascending)) for chord in chords]
+        return await asyncio.get_running_loop().run_in_executor(self._render_executor, _render_sheet, builder_key, chord_fields, columns)
+
+    async def get_metrics(self, query):
+        return self._json(self.metrics.get_stats())
+
+    async def _dispatch(self, path, query):
+        if path == "/metrics":
+            return await self.get_metrics(query)
+        key = (path, tuple(sorted((name, tuple(values)) for name, values in query.items())))
+        if key in self._pending:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(self._pending[key])
+
+        task = asyncio.ensure_future(self.routes[path](query))
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def handle_request(self, method, target):
+        start = time.perf_counter()
+        url = urlsplit(target)
+        endpoint = url.path if url.path in self.routes else "other"
+        self.metrics.in_flight += 1
+        try:
+            if endpoint == "other":
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown path {url.path}")
+            if method != "GET":
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"Method {method} not allowed")
+            content_type, body = await self._dispatch(url.path, parse_qs(url.query, keep_blank_values=True))
+            status = HTTPStatus.OK
+        except HTTPError as error:
+            status = error.status
+            content_type, body = self._json({"error": str(error)})
+        except (KeyError, ValueError) as error:
+            status = HTTPStatus.BAD_REQUEST
+            content_type, body = self._json({"error": str(error)})
+        except Exception as error:
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            content_type, body = self._json({"error": f"{type(error).__name__}: {error}"})
+        finally:
+            self.metrics.in_flight -= 1
+        self.metrics.record(endpoint, time.perf_counter() - start, failed=status != HTTPStatus.OK)
+        return status, content_type, body
+
+    async def handle_connection(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive, enough for GET requests
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0)):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                status, content_type, body = await self.handle_request(method, target)
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"Serving on http://{host}:{port}", flush=True)
+        # SIGTERM stops serving like Ctrl-C does, so main() still shuts the worker processes down
+        stopped = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+        async with server:
+            await stopped.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP service for chord queries and chord sheets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    parser.add_argument("--db", default=default_db_path)
+    parser.add_argument("--render-workers", type=int, default=None, help="processes rendering chord sheets, one per CPU by default")
+    parser.add_argument("--max-limit", type=int, default=1000, help="most chords a /chords or /render request returns")
+    args = parser.parse_args(argv)
+
+    service = ChordService(args.db, render_workers=args.render_workers, max_limit=args.max_limit)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
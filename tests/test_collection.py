@@ -0,0 +1,253 @@
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from guitar_chords.collection.chord import GuitarChord
+from guitar_chords.collection.collection import ChordCollection
+from guitar_chords.collection.columnar import ColumnarChordCollection
+from guitar_chords.collection.resources.scales import scales
+from guitar_chords.collection.resources.transposable_figures import transposable_figures
+
+bundled_db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "collection", "resources", "chord_collection.db")
+
+# A barre shape of transposable_figures, which transpose() accepts at any starting fret above 0
+barre_figure = [None, 3, 2, 3, 1, None]
+shifted_figures = transposable_figures + [[fret + 1 if fret is not None else None for fret in figure] for figure in transposable_figures]
+
+
+def make_chord(root, starting_fret, chord_type=""):
+    return GuitarChord(root, chord_type, shifted_figures, finger_ascending=barre_figure.copy(), starting_fret=starting_fret)
+
+
+def fresh_collection(chords):
+    # Same chords in a collection whose indexes have never been built
+    collection = ChordCollection()
+    collection.chords = [make_chord(chord.root, chord.starting_fret, chord.chord_type) for chord in chords]
+    return collection
+
+
+class GuitarChordTest(unittest.TestCase):
+    def assert_features(self, chord, expected):
+        self.assertEqual(chord.get_notes(), expected.get_notes())
+        self.assertEqual(chord.calculate_frequencies(), expected.calculate_frequencies())
+        self.assertEqual(chord.get_pitch_class_mask(), expected.get_pitch_class_mask())
+        self.assertEqual(chord.get_string_mask(), expected.get_string_mask())
+        self.assertEqual(chord.get_inversion(), expected.get_inversion())
+        self.assertEqual(chord.is_open(), expected.is_open())
+
+    def test_features_after_direct_assignment(self):
+        collection = ChordCollection()
+        collection.load(bundled_db_path)
+        chord = collection.chords[0]
+        self.assert_features(chord, make_chord(chord.root, chord.starting_fret, chord.chord_type))
+        chord.root = "F#"
+        chord.starting_fret = 5
+        chord.finger_ascending = barre_figure
+        self.assert_features(chord, make_chord("F#", 5))
+        chord.finger_ascending = [0, 1, 0, 2, 3, None]
+        self.assert_features(chord, GuitarChord("F#", "", transposable_figures, finger_ascending=[0, 1, 0, 2, 3, None], starting_fret=5))
+
+    def test_finger_ascending_is_immutable(self):
+        fingers = barre_figure.copy()
+        chord = GuitarChord("C", "", shifted_figures, finger_ascending=fingers, starting_fret=3)
+        fingers[0] = 1
+        self.assertEqual(chord.finger_ascending, tuple(barre_figure))
+        with self.assertRaises(TypeError):
+            chord.finger_ascending[0] = 1
+
+
+class ChordCollectionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.collection = ChordCollection()
+        self.collection.chords = [make_chord("C", 8), make_chord("G", 3)]
+        # Build the root index
+        self.assertEqual(len(self.collection.only({"root": ["C"]})), 1)
+
+    def test_only_after_transpose(self):
+        self.collection.chords[0].transpose(-2)
+        self.assertEqual(self.collection.only({"root": ["C"]}), [])
+        self.assertEqual(self.collection.only({"root": ["A#"]}), [self.collection.chords[0]])
+
+    def test_only_after_item_assignment(self):
+        self.collection.chords[1] = make_chord("C", 5)
+        self.assertEqual(self.collection.only({"root": ["C"]}), self.collection.chords)
+
+    def test_only_after_list_assignment(self):
+        self.collection.chords = [make_chord("D", 2), make_chord("E", 4)]
+        self.assertEqual(self.collection.only({"root": ["C"]}), [])
+        self.assertEqual(self.collection.only({"starting_fret": [4]}), [self.collection.chords[1]])
+
+    def test_assigned_list_is_copied(self):
+        chords = [make_chord("D", 2)]
+        self.collection.chords = chords
+        chords.append(make_chord("C", 5))
+        self.assertEqual(len(self.collection.chords), 1)
+        self.collection.chords.append(make_chord("C", 5))
+        self.assertEqual(self.collection.only({"root": ["C"]}), [self.collection.chords[1]])
+
+    def test_only_after_direct_assignment(self):
+        chord = self.collection.chords[0]
+        self.assertTrue(self.collection.chord_exists(make_chord("C", 8)))
+        chord.root = "F#"
+        self.assertEqual(self.collection.only({"root": ["C"]}), [])
+        self.assertEqual(self.collection.only({"root": ["F#"]}), [chord])
+        self.assertFalse(self.collection.chord_exists(make_chord("C", 8)))
+        self.assertTrue(self.collection.chord_exists(make_chord("F#", 8)))
+        chord.starting_fret = 3
+        self.assertEqual(self.collection.only({"starting_fret": [3]}), self.collection.chords)
+
+    def test_shared_chord_invalidates_both_collections(self):
+        other = ChordCollection()
+        other.chords = [self.collection.chords[0], make_chord("D", 5)]
+        self.assertEqual(len(other.only({"root": ["C"]})), 1)
+        self.collection.chords[0].transpose(-2)
+        self.assertEqual(self.collection.only({"root": ["C"]}), [])
+        self.assertEqual(other.only({"root": ["C"]}), [])
+        self.assertEqual(other.only({"root": ["A#"]}), [self.collection.chords[0]])
+
+    def test_transpose_keeps_other_indexes(self):
+        other = fresh_collection(self.collection.chords)
+        other.only({"root": ["C"]})
+        postings = other._postings
+        self.collection.chords[0].transpose(-2)
+        other.only({"root": ["C"]})
+        self.assertIs(other._postings, postings)
+
+    def test_pickled_chord_leaves_collection_behind(self):
+        chord = pickle.loads(pickle.dumps(self.collection.chords[0]))
+        postings = self.collection._postings
+        chord.transpose(-2)
+        self.assertEqual(chord.get_key(), make_chord("A#", 6).get_key())
+        self.collection.only({"root": ["C"]})
+        self.assertIs(self.collection._postings, postings)
+
+    def test_scratch_transpose_keeps_indexes(self):
+        postings = self.collection._postings
+        make_chord("C", 2).transpose(1)
+        self.collection.only({"root": ["C"]})
+        self.assertIs(self.collection._postings, postings)
+
+    def test_chord_exists_after_transpose(self):
+        self.assertTrue(self.collection.chord_exists(make_chord("C", 8)))
+        self.collection.chords[0].transpose(-2)
+        self.assertFalse(self.collection.chord_exists(make_chord("C", 8)))
+        self.assertTrue(self.collection.chord_exists(make_chord("A#", 6)))
+        self.assertFalse(self.collection.add_chord(make_chord("A#", 6)))
+        self.assertTrue(self.collection.add_chord(make_chord("C", 8)))
+        self.assertEqual(self.collection.only({"root": ["C"]}), [self.collection.chords[2]])
+
+    def test_many_transposes(self):
+        chords = [make_chord(root, starting_fret, f"type_{index % 5}") for index, (root, starting_fret) in enumerate((root, starting_fret) for root in GuitarChord.all_notes for starting_fret in range(1, 10))]
+        collection = fresh_collection(chords)
+        whitelists = [{"root": ["C", "G"]}, {"starting_fret": [2, 5]}, {"chord_type": ["type_1"], "root": ["A#", "D"]}]
+        for whitelist in whitelists:
+            collection.only(whitelist)
+        for index, chord in enumerate(collection.chords):
+            if index % 3 == 0:
+                chord.transpose(-1 if chord.starting_fret > 1 else 1)
+        expected = fresh_collection(collection.chords)
+        for whitelist in whitelists:
+            self.assertEqual([str(chord) for chord in collection.only(whitelist)], [str(chord) for chord in expected.only(whitelist)])
+            self.assertEqual([str(chord) for chord in collection.filter_out(whitelist)], [str(chord) for chord in expected.filter_out(whitelist)])
+
+    def test_tonality_after_transpose(self):
+        chords = [make_chord(root, starting_fret) for root in ("C", "D", "F", "G") for starting_fret in range(1, 10)]
+        collection = fresh_collection(chords)
+        ionian = scales["ionian"]
+        collection.get_tonality("C", ionian)
+        for chord in collection.chords[:12]:
+            chord.transpose(-1 if chord.starting_fret > 1 else 2)
+        expected = fresh_collection(collection.chords)
+        for root in ("C", "D", "F", "G", "B"):
+            for amplitude in (3, 4):
+                self.assertEqual(collection.get_tonality_frets(root, ionian, amplitude), expected.get_tonality_frets(root, ionian, amplitude))
+                self.assertEqual([str(chord) for chord in collection.get_tonality(root, ionian, amplitude)], [str(chord) for chord in expected.get_tonality(root, ionian, amplitude)])
+
+
+class ColumnarChordCollectionTest(unittest.TestCase):
+    def test_from_collection_keeps_figures(self):
+        # Chords of shifted_figures slide further than transposable_figures allows
+        collection = ChordCollection()
+        collection.chords = [make_chord(root, starting_fret) for root in ("C", "E") for starting_fret in (1, 2)]
+        columnar = ColumnarChordCollection.from_collection(collection)
+        collection.extend_barre_chords()
+        columnar.extend_barre_chords()
+        self.assertEqual([str(chord) for chord in columnar], [str(chord) for chord in collection.chords])
+        self.assertTrue(all(chord.transposable_figures is shifted_figures for chord in columnar))
+
+    def test_load_in_batches(self):
+        collection = ChordCollection()
+        collection.load(bundled_db_path)
+        columnar = ColumnarChordCollection()
+        columnar.load(bundled_db_path, batch_size=7)
+        self.assertEqual([str(chord) for chord in columnar], [str(chord) for chord in collection.chords])
+        self.assertEqual(list(columnar.pitch_class_masks), [chord.get_pitch_class_mask() for chord in collection.chords])
+
+
+class ChordCollectionSaveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "chords.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def stored_keys(self):
+        collection = ChordCollection()
+        collection.load(self.db_path)
+        return [chord.get_key() for chord in collection.chords]
+
+    def assert_saved(self, collection):
+        stored_keys = self.stored_keys()
+        self.assertEqual(len(stored_keys), len(set(stored_keys)))
+        self.assertLessEqual({chord.get_key() for chord in collection.chords}, set(stored_keys))
+
+    def test_incremental_save_of_legacy_duplicates(self):
+        # The bundled database was written before saves deduplicated, F at fret 1 is stored twice
+        shutil.copy(bundled_db_path, self.db_path)
+        collection = ChordCollection()
+        collection.load(self.db_path)
+        f_major = collection.chords[8]
+        self.assertEqual([chord.get_key() for chord in collection.chords].count(f_major.get_key()), 2)
+
+        f_major.transposable_figures = shifted_figures
+        f_major.transpose(2)
+        collection.save(self.db_path, incremental=True)
+        self.assert_saved(collection)
+
+        # Later incremental saves run against the deduplicated table
+        collection.chords[20].transposable_figures = shifted_figures
+        collection.chords[20].transpose(1)
+        collection.save(self.db_path, incremental=True)
+        self.assert_saved(collection)
+
+    def test_incremental_save_of_identical_rows(self):
+        collection = ChordCollection()
+        collection.chords = [make_chord("C", 3), make_chord("C", 3), make_chord("D", 5)]
+        connection = sqlite3.connect(self.db_path)
+        with connection:
+            ChordCollection._create_schema(connection.cursor())
+            connection.executemany('''
+                INSERT INTO TABLE_CHORDS (ROOT, TYPE, STARTING_FRET, STRING_1, STRING_2, STRING_3, STRING_4, STRING_5, STRING_6)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(chord.root, chord.chord_type, chord.starting_fret, *chord.finger_ascending) for chord in collection.chords])
+        connection.close()
+
+        collection.load(self.db_path)
+        for chord in collection.chords:
+            chord.transposable_figures = shifted_figures
+        collection.chords[1].transpose(1)
+        collection.save(self.db_path, incremental=True)
+        self.assert_saved(collection)
+
+        collection.chords[0].transpose(2)
+        collection.chords[2].transpose(-1)
+        collection.save(self.db_path, incremental=True)
+        self.assert_saved(collection)
+        self.assertEqual(sorted(self.stored_keys()), sorted({chord.get_key() for chord in collection.chords}))
+
+
+if __name__ == "__main__":
+    unittest.main()